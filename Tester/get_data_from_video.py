@@ -41,10 +41,14 @@ def parse_time(time: str) -> int | None:
     return None
 
 
-def get_latency(frame: MatLike) -> float | None:
+def binarize(frame: MatLike) -> MatLike:
     converted = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
     converted = cv2.threshold(converted, 127, 255, cv2.THRESH_BINARY)[1]
-    converted = cv2.bitwise_not(converted)
+    return cv2.bitwise_not(converted)
+
+
+def get_latency(frame: MatLike) -> float | None:
+    converted = binarize(frame)
 
     original_time_image = converted[0:60, 125:425]
     new_time_image = converted[90:150, 125:425]
@@ -65,6 +69,21 @@ def get_latency(frame: MatLike) -> float | None:
     return None
 
 
+def get_frame_number(frame: MatLike) -> int | None:
+    """Reads the frame number the sender drew at the end of its line."""
+
+    sender_text_image = binarize(frame)[0:60, :]
+
+    config = "--psm 6 --oem 1 -c tessedit_char_whitelist=0123456789:.()TimeFra"
+    text: str = pyt.image_to_string(sender_text_image, config=config)
+
+    _, _, frame_number = text.strip().rpartition(":")
+    try:
+        return int(frame_number.strip())
+    except ValueError:
+        return None
+
+
 def create_latency_measurements(folder: Path):
     mp4_path = folder / "out.mp4"
     output_path = folder / "latency.csv"
@@ -89,11 +108,12 @@ def create_latency_measurements(folder: Path):
                 )
 
 
-root = Path("./Runs/")
+if __name__ == "__main__":
+    root = Path("./Runs/")
 
-# Walk through all the folders in the root directory
-for path, _, files in root.walk():
-    if "out.mp4" not in files:
-        continue
+    # Walk through all the folders in the root directory
+    for path, _, files in root.walk():
+        if "out.mp4" not in files:
+            continue
 
-    create_latency_measurements(path)
+        create_latency_measurements(path)
@@ -0,0 +1,335 @@
+import mmap
+import struct
+import numpy as np
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Tuple
+
+CONTAINERS = {b"moov", b"trak", b"mdia", b"minf", b"stbl", b"mvex", b"moof", b"traf"}
+NON_SYNC_SAMPLE = 0x00010000
+
+
+@dataclass
+class FrameTiming:
+    """Per frame timing of a video track in decode order, times are in ms."""
+
+    dts: np.ndarray
+    pts: np.ndarray
+    size: np.ndarray
+    keyframe: np.ndarray
+
+
+@dataclass
+class Track:
+    track_id: int = 0
+    timescale: int = 0
+    handler: bytes = b""
+    stts: np.ndarray | None = None
+    ctts: np.ndarray | None = None
+    stss: np.ndarray | None = None
+    stsz: np.ndarray | None = None
+
+
+@dataclass
+class Fragment:
+    track_id: int
+    dts: np.ndarray
+    cto: np.ndarray
+    size: np.ndarray
+    keyframe: np.ndarray
+
+
+def iterate_boxes(data, start: int, end: int) -> Iterator[Tuple[bytes, int, int]]:
+    """Yields the type, payload start and end of every box between start and end."""
+
+    while start + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", data, start)
+        header = 8
+        if size == 1:
+            (size,) = struct.unpack_from(">Q", data, start + 8)
+            header = 16
+        elif size == 0:
+            size = end - start
+
+        if size < header or start + size > end:
+            return
+
+        yield box_type, start + header, start + size
+        start += size
+
+
+def full_box(data, start: int) -> Tuple[int, int]:
+    (version_and_flags,) = struct.unpack_from(">I", data, start)
+    return version_and_flags >> 24, version_and_flags & 0xFFFFFF
+
+
+def table(data, start: int, count: int, columns: int, dtype: str) -> np.ndarray:
+    return (
+        np.frombuffer(data, dtype=dtype, count=count * columns, offset=start)
+        .reshape(count, columns)
+        .astype(np.int64)
+    )
+
+
+def parse_stbl_box(data, box_type: bytes, start: int, end: int, track: Track):
+    if box_type == b"stts":
+        (count,) = struct.unpack_from(">I", data, start + 4)
+        track.stts = table(data, start + 8, count, 2, ">u4")
+    elif box_type == b"ctts":
+        version, _ = full_box(data, start)
+        (count,) = struct.unpack_from(">I", data, start + 4)
+        entries = table(data, start + 8, count, 2, ">u4")
+        if version == 1:
+            entries[:, 1] = entries[:, 1].astype(np.uint32).view(np.int32)
+        track.ctts = entries
+    elif box_type == b"stss":
+        (count,) = struct.unpack_from(">I", data, start + 4)
+        track.stss = table(data, start + 8, count, 1, ">u4")[:, 0]
+    elif box_type == b"stsz":
+        sample_size, count = struct.unpack_from(">II", data, start + 4)
+        if sample_size != 0:
+            track.stsz = np.full(count, sample_size, dtype=np.int64)
+        else:
+            track.stsz = table(data, start + 12, count, 1, ">u4")[:, 0]
+
+
+def parse_trak(data, start: int, end: int) -> Track:
+    track = Track()
+    stack = [(start, end)]
+    while stack:
+        box_start, box_end = stack.pop()
+        for box_type, payload, payload_end in iterate_boxes(data, box_start, box_end):
+            if box_type in CONTAINERS:
+                stack.append((payload, payload_end))
+            elif box_type == b"tkhd":
+                version, _ = full_box(data, payload)
+                (track.track_id,) = struct.unpack_from(
+                    ">I", data, payload + (20 if version == 1 else 12)
+                )
+            elif box_type == b"mdhd":
+                version, _ = full_box(data, payload)
+                (track.timescale,) = struct.unpack_from(
+                    ">I", data, payload + (20 if version == 1 else 12)
+                )
+            elif box_type == b"hdlr":
+                track.handler = bytes(data[payload + 8 : payload + 12])
+            else:
+                parse_stbl_box(data, box_type, payload, payload_end, track)
+    return track
+
+
+def parse_trex(data, start: int) -> Tuple[int, Tuple[int, int, int]]:
+    track_id, _, duration, size, flags = struct.unpack_from(">IIIII", data, start + 4)
+    return track_id, (duration, size, flags)
+
+
+def parse_traf(
+    data,
+    start: int,
+    end: int,
+    defaults: Dict[int, Tuple[int, int, int]],
+    next_dts: Dict[int, int],
+) -> List[Fragment]:
+    fragments: List[Fragment] = []
+    track_id = 0
+    duration = size = flags = 0
+
+    for box_type, payload, _ in iterate_boxes(data, start, end):
+        if box_type == b"tfhd":
+            _, tfhd_flags = full_box(data, payload)
+            (track_id,) = struct.unpack_from(">I", data, payload + 4)
+            duration, size, flags = defaults.get(track_id, (0, 0, 0))
+            offset = payload + 8
+            if tfhd_flags & 0x01:
+                offset += 8
+            if tfhd_flags & 0x02:
+                offset += 4
+            if tfhd_flags & 0x08:
+                (duration,) = struct.unpack_from(">I", data, offset)
+                offset += 4
+            if tfhd_flags & 0x10:
+                (size,) = struct.unpack_from(">I", data, offset)
+                offset += 4
+            if tfhd_flags & 0x20:
+                (flags,) = struct.unpack_from(">I", data, offset)
+        elif box_type == b"tfdt":
+            version, _ = full_box(data, payload)
+            (next_dts[track_id],) = struct.unpack_from(
+                ">Q" if version == 1 else ">I", data, payload + 4
+            )
+        elif box_type == b"trun":
+            version, trun_flags = full_box(data, payload)
+            (count,) = struct.unpack_from(">I", data, payload + 4)
+            if count == 0:
+                continue
+            offset = payload + 8
+            if trun_flags & 0x01:
+                offset += 4
+            first_flags = None
+            if trun_flags & 0x04:
+                (first_flags,) = struct.unpack_from(">I", data, offset)
+                offset += 4
+
+            present = [bool(trun_flags & bit) for bit in (0x100, 0x200, 0x400, 0x800)]
+            entries = table(data, offset, count, sum(present), ">u4")
+            columns = iter(range(sum(present)))
+
+            def column(is_present: bool, default: int) -> np.ndarray:
+                if is_present:
+                    return entries[:, next(columns)]
+                return np.full(count, default, dtype=np.int64)
+
+            durations = column(present[0], duration)
+            sizes = column(present[1], size)
+            sample_flags = column(present[2], flags)
+            cto = column(present[3], 0)
+            if version == 1:
+                cto = cto.astype(np.uint32).view(np.int32).astype(np.int64)
+            if first_flags is not None:
+                sample_flags[0] = first_flags
+
+            start_dts = next_dts.get(track_id, 0)
+            dts = start_dts + np.concatenate(([0], np.cumsum(durations)[:-1]))
+            next_dts[track_id] = start_dts + int(durations.sum())
+            fragments.append(
+                Fragment(
+                    track_id=track_id,
+                    dts=dts,
+                    cto=cto,
+                    size=sizes,
+                    keyframe=(sample_flags & NON_SYNC_SAMPLE) == 0,
+                )
+            )
+    return fragments
+
+
+def sample_table_timing(track: Track) -> Tuple[np.ndarray, ...]:
+    if track.stts is None or track.stsz is None:
+        count = 0 if track.stsz is None else len(track.stsz)
+        empty = np.zeros(count, dtype=np.int64)
+        return empty, empty, empty, np.zeros(count, dtype=bool)
+
+    deltas = np.repeat(track.stts[:, 1], track.stts[:, 0])
+    dts = np.concatenate(([0], np.cumsum(deltas)[:-1]))
+    count = min(len(dts), len(track.stsz))
+
+    cto = np.zeros(count, dtype=np.int64)
+    if track.ctts is not None:
+        offsets = np.repeat(track.ctts[:, 1], track.ctts[:, 0])[:count]
+        cto[: len(offsets)] = offsets
+
+    if track.stss is None:
+        keyframe = np.ones(count, dtype=bool)
+    else:
+        keyframe = np.zeros(count, dtype=bool)
+        samples = track.stss[(track.stss >= 1) & (track.stss <= count)] - 1
+        keyframe[samples] = True
+
+    return dts[:count], cto, track.stsz[:count], keyframe
+
+
+def parse_mp4(data) -> FrameTiming:
+    tracks: List[Track] = []
+    defaults: Dict[int, Tuple[int, int, int]] = {}
+    next_dts: Dict[int, int] = {}
+    fragments: List[Fragment] = []
+
+    for box_type, payload, payload_end in iterate_boxes(data, 0, len(data)):
+        if box_type == b"moov":
+            for child, child_payload, child_end in iterate_boxes(
+                data, payload, payload_end
+            ):
+                if child == b"trak":
+                    tracks.append(parse_trak(data, child_payload, child_end))
+                elif child == b"mvex":
+                    for mvex_child, trex, _ in iterate_boxes(
+                        data, child_payload, child_end
+                    ):
+                        if mvex_child == b"trex":
+                            track_id, values = parse_trex(data, trex)
+                            defaults[track_id] = values
+        elif box_type == b"moof":
+            for child, child_payload, child_end in iterate_boxes(
+                data, payload, payload_end
+            ):
+                if child == b"traf":
+                    fragments += parse_traf(
+                        data, child_payload, child_end, defaults, next_dts
+                    )
+
+    video = [track for track in tracks if track.handler == b"vide"]
+    if len(video) == 0 or video[0].timescale == 0:
+        raise ValueError("The file has no video track")
+    track = video[0]
+
+    dts, cto, size, keyframe = sample_table_timing(track)
+    track_fragments = [f for f in fragments if f.track_id == track.track_id]
+    if len(track_fragments) > 0:
+        dts = np.concatenate([dts] + [f.dts for f in track_fragments])
+        cto = np.concatenate([cto] + [f.cto for f in track_fragments])
+        size = np.concatenate([size] + [f.size for f in track_fragments])
+        keyframe = np.concatenate([keyframe] + [f.keyframe for f in track_fragments])
+
+    return FrameTiming(
+        dts=dts * 1000 / track.timescale,
+        pts=(dts + cto) * 1000 / track.timescale,
+        size=size,
+        keyframe=keyframe,
+    )
+
+
+def read_frame_timing(path: Path) -> FrameTiming:
+    """
+    Reads the frame timing from the boxes of the file without decoding it. Edit
+    lists are not applied, so the pts include the composition offset of the
+    first frame.
+    """
+
+    with (
+        open(path, "rb") as file,
+        mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data,
+    ):
+        return parse_mp4(data)
+
+
+def create_timing_measurements(folder: Path):
+    timing = read_frame_timing(folder / "out.mp4")
+    np.savetxt(
+        folder / "timing.csv",
+        np.column_stack(
+            (
+                np.arange(len(timing.dts)),
+                timing.dts,
+                timing.pts,
+                timing.size,
+                timing.keyframe,
+            )
+        ),
+        delimiter=",",
+        header="frame,dts,pts,size,keyframe",
+        comments="",
+        fmt=["%d", "%.3f", "%.3f", "%d", "%d"],
+    )
+
+    if len(timing.pts) < 2:
+        return
+
+    intervals = np.diff(np.sort(timing.pts))
+    duration = (timing.pts.max() - timing.pts.min()) / 1000
+    keyframes = np.flatnonzero(timing.keyframe)
+    print(
+        f"{folder}: {len(timing.pts)} frames, "
+        f"interval {intervals.mean():.2f}ms +- {intervals.std():.2f}ms, "
+        f"bitrate {timing.size.sum() * 8 / duration / 10**6:.2f}Mbit/s, "
+        f"keyframe spacing {np.diff(keyframes).mean() if len(keyframes) > 1 else 0:.1f} frames"
+    )
+
+
+if __name__ == "__main__":
+    root = Path("./Runs/")
+
+    for path, _, files in root.walk():
+        if "out.mp4" not in files:
+            continue
+
+        create_timing_measurements(path)
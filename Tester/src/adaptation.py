@@ -0,0 +1,153 @@
+from time import monotonic
+from pathlib import Path
+from typing import Tuple
+from dataclasses import dataclass
+from common import Packet, Address, Settings
+from udp import (
+    U16,
+    SENDER_HEADER_SIZE,
+    SENDER_RESOLUTION_OFFSET,
+    SENDER_FRAME_RATE_OFFSET,
+    RECEIVER_HEADER_SIZE,
+    RECEIVER_RESOLUTION_OFFSET,
+    RECEIVER_FRAME_RATE_OFFSET,
+    RESOLUTIONS,
+    FRAME_RATES,
+)
+
+Stream = Tuple[int, int]
+
+
+def parse_stream(data: bytes, resolution_offset: int, frame_rate_offset: int):
+    (resolution,) = U16.unpack_from(data, resolution_offset)
+    frame_rate = data[frame_rate_offset]
+    if resolution not in RESOLUTIONS or frame_rate not in FRAME_RATES:
+        return None
+    return resolution, frame_rate
+
+
+@dataclass
+class Step:
+    time: float
+    old_bandwidth: float
+    new_bandwidth: float
+    stream: Stream
+    request_time: float | None = None
+    adapted_time: float | None = None
+    offered: int = 0
+    forwarded: int = 0
+
+
+class AdaptationBenchmark:
+    """
+    Measures how the sender reacts to every change of the bandwidth and writes
+    one line per step to adaptation.csv.
+
+    The reaction time is the time from the step to the first sender packet with
+    a different resolution or frame rate arriving at the proxy, the request time
+    is the time to the first receiver packet asking for it. Overshoot is the
+    number of bytes the sender offered above the new bandwidth and goodput lost
+    the number of bytes the link could have carried but were not forwarded, both
+    until the sender adapted.
+    """
+
+    def __init__(self, folder: Path, receiver_address: Address, settings: Settings):
+        self.receiver_address = receiver_address
+        self.settings = settings
+        self.bandwidth = settings.bandwidth
+        self.stream: Stream | None = None
+        self.step: Step | None = None
+
+        self.file = open(folder.joinpath("adaptation.csv"), "w")
+        self.file.write(
+            "step_time,old_bandwidth,new_bandwidth,request_time,reaction_time,overshoot,goodput_lost\n"
+        )
+
+    def check_step(self):
+        if self.settings.bandwidth == self.bandwidth:
+            return
+
+        if self.step is not None:
+            self.finish(monotonic())
+
+        if self.stream is not None:
+            self.step = Step(
+                time=self.settings.last_update,
+                old_bandwidth=self.bandwidth,
+                new_bandwidth=self.settings.bandwidth,
+                stream=self.stream,
+            )
+        self.bandwidth = self.settings.bandwidth
+
+    def arrived(self, packet: Packet):
+        self.check_step()
+        if packet.corrupted:
+            return
+
+        # Stamped when the packet reached the proxy, so the emulated latency
+        # and the bandwidth queue are not part of the reaction time.
+        arrival_time = packet.arrival_time or monotonic()
+        if packet.send_address == self.receiver_address:
+            if self.step is not None:
+                self.step.offered += len(packet.data)
+            if len(packet.data) < SENDER_HEADER_SIZE:
+                return
+
+            stream = parse_stream(
+                packet.data, SENDER_RESOLUTION_OFFSET, SENDER_FRAME_RATE_OFFSET
+            )
+            if stream is None:
+                return
+            self.stream = stream
+
+            if self.step is not None and stream != self.step.stream:
+                self.step.adapted_time = arrival_time
+                self.finish(arrival_time)
+        elif (
+            self.step is not None
+            and self.step.request_time is None
+            and len(packet.data) >= RECEIVER_HEADER_SIZE
+        ):
+            stream = parse_stream(
+                packet.data, RECEIVER_RESOLUTION_OFFSET, RECEIVER_FRAME_RATE_OFFSET
+            )
+            if stream is not None and stream != self.step.stream:
+                self.step.request_time = arrival_time
+
+    def forwarded(self, packet: Packet):
+        """Counts the goodput of the step, the reaction is taken on arrival."""
+
+        self.check_step()
+        if (
+            self.step is None
+            or packet.send_address != self.receiver_address
+            or packet.corrupted
+        ):
+            return
+        self.step.forwarded += len(packet.data)
+
+    def finish(self, end_time: float):
+        step = self.step
+        assert step is not None
+        self.step = None
+
+        duration = end_time - step.time
+        capacity = step.new_bandwidth * duration
+        overshoot = max(step.offered - capacity, 0)
+        goodput_lost = max(capacity - step.forwarded, 0)
+
+        request_time = (
+            "" if step.request_time is None else step.request_time - step.time
+        )
+        reaction_time = (
+            "" if step.adapted_time is None else step.adapted_time - step.time
+        )
+        self.file.write(
+            f"{step.time - self.settings.start_time},{step.old_bandwidth},{step.new_bandwidth},{request_time},{reaction_time},{overshoot},{goodput_lost}\n"
+        )
+        self.file.flush()
+
+    def close(self):
+        if self.step is not None:
+            self.finish(monotonic())
+        self.file.close()
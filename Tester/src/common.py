@@ -1,8 +1,9 @@
+import copy
 import math
-from time import time
+from time import monotonic
 from pathlib import Path
 from random import Random
-from typing import TextIO, Tuple
+from typing import Dict, List, TextIO, Tuple
 from dataclasses import dataclass
 from abc import ABC, abstractmethod
 
@@ -90,6 +91,26 @@ class RandomGaussWithSpikes(Provider):
         return round(self.get())
 
 
+class StepProvider(Provider):
+    """Returns each value of the script for its number of updates, then repeats."""
+
+    def __init__(self, steps: List[Tuple[int, float]]):
+        self.steps = steps
+        self.index = 0
+        self.remaining = steps[0][0]
+
+    def get(self) -> float:
+        while self.remaining <= 0:
+            self.index = (self.index + 1) % len(self.steps)
+            self.remaining = self.steps[self.index][0]
+
+        self.remaining -= 1
+        return self.steps[self.index][1]
+
+    def get_int(self) -> int:
+        return round(self.get())
+
+
 class Settings:
     def __init__(
         self,
@@ -100,12 +121,19 @@ class Settings:
         packet_loss_rate: Provider,
         packet_corruption_rate: Provider,
         no_of_packet_corruptions: Provider,
+        bit_error_rate: Provider | None = None,
+        queue_limit: Provider | None = None,
+        packet_overhead: Provider | None = None,
+        max_packet_rate: Provider | None = None,
+        mtu: Provider | None = None,
+        fragment: Provider | None = None,
+        loss_reference_size: Provider | None = None,
     ):
         if folder.exists():
             raise Exception("The Scenario folder already exists")
         folder.mkdir()
 
-        self.start_time = time()
+        self.start_time = monotonic()
         self.update_every = update_every
         self.last_update = self.start_time
         self.file = open(folder.joinpath("data.csv"), "w")
@@ -115,40 +143,146 @@ class Settings:
         self.packet_loss_rate_provider = packet_loss_rate
         self.packet_corruption_rate_provider = packet_corruption_rate
         self.no_of_packet_corruptions = no_of_packet_corruptions
+        self.bit_error_rate_provider = bit_error_rate
+        self.queue_limit_provider = queue_limit
+        self.packet_overhead_provider = packet_overhead
+        self.max_packet_rate_provider = max_packet_rate
+        self.mtu_provider = mtu
+        self.fragment_provider = fragment
+        self.loss_reference_size_provider = loss_reference_size
 
         self.bandwidth = bandwidth.get()
         self.latency = latency.get()
         self.packet_loss_rate = packet_loss_rate.get()
         self.packet_corruption_rate = packet_corruption_rate.get()
+        self.bit_error_rate = 0 if bit_error_rate is None else bit_error_rate.get()
+        self.queue_limit = math.inf if queue_limit is None else queue_limit.get()
+        # The link model: bytes added to every packet or fragment, packets or
+        # fragments per second, the largest packet, whether larger packets are
+        # fragmented instead of dropped and the packet size packet_loss_rate
+        # applies to, 0 makes the loss independent of the size.
+        self.packet_overhead = 0 if packet_overhead is None else packet_overhead.get()
+        self.max_packet_rate = (
+            math.inf if max_packet_rate is None else max_packet_rate.get()
+        )
+        self.mtu = math.inf if mtu is None else mtu.get()
+        self.fragment = 0 if fragment is None else fragment.get()
+        self.loss_reference_size = (
+            0 if loss_reference_size is None else loss_reference_size.get()
+        )
 
         self.file.write(
-            "time,bandwidth,latency,packet_loss_rate,packet_corruption_rate\n"
+            "time,bandwidth,latency,packet_loss_rate,packet_corruption_rate,bit_error_rate,queue_limit,packet_overhead,max_packet_rate,mtu,fragment,loss_reference_size\n"
         )
         self.write()
 
+    def start(self, arrival_time: float):
+        """
+        Starts the run at the arrival of the first packet. The kernel timestamp
+        of the packet is older than the last update before it was read.
+        """
+
+        self.start_time = arrival_time
+        self.last_update = arrival_time
+
     def update(self, started: bool):
         if not started:
-            self.last_update = time()
-            self.start_time = time()
+            self.last_update = monotonic()
+            self.start_time = monotonic()
             return
 
-        if time() - self.last_update > self.update_every:
-            self.last_update = time()
+        if monotonic() - self.last_update > self.update_every:
+            self.last_update = monotonic()
             self.bandwidth = self.bandiwdth_provider.get()
             self.latency = self.latency_provider.get()
             self.packet_loss_rate = self.packet_loss_rate_provider.get()
             self.packet_corruption_rate = self.packet_corruption_rate_provider.get()
+            if self.bit_error_rate_provider is not None:
+                self.bit_error_rate = self.bit_error_rate_provider.get()
+            if self.queue_limit_provider is not None:
+                self.queue_limit = self.queue_limit_provider.get()
+            if self.packet_overhead_provider is not None:
+                self.packet_overhead = self.packet_overhead_provider.get()
+            if self.max_packet_rate_provider is not None:
+                self.max_packet_rate = self.max_packet_rate_provider.get()
+            if self.mtu_provider is not None:
+                self.mtu = self.mtu_provider.get()
+            if self.fragment_provider is not None:
+                self.fragment = self.fragment_provider.get()
+            if self.loss_reference_size_provider is not None:
+                self.loss_reference_size = self.loss_reference_size_provider.get()
             self.write()
 
+    def set_providers(self, providers: Dict[str, Provider]):
+        """
+        Replaces the providers by name and applies their values immediately.
+        Every value is checked first, so an invalid provider raises and leaves
+        the settings unchanged.
+        """
+
+        for name in providers:
+            if name not in PROVIDER_ATTRIBUTES:
+                raise ValueError(f"Unknown setting {name}")
+
+        values: Dict[str, float] = {}
+        for name, provider in providers.items():
+            if name == "no_of_packet_corruptions":
+                # Drawn for every corrupted packet, so a copy is checked to
+                # keep the first value for the first packet.
+                provider = copy.deepcopy(provider)
+            values[name] = provider.get()
+            check_value(name, values[name])
+
+        for name, provider in providers.items():
+            setattr(self, PROVIDER_ATTRIBUTES[name], provider)
+            if name != "no_of_packet_corruptions":
+                setattr(self, name, values[name])
+
+        self.last_update = monotonic()
+        self.write()
+
     def write(self):
         self.file.write(
-            f"{self.last_update - self.start_time},{self.bandwidth},{self.latency},{self.packet_loss_rate},{self.packet_corruption_rate}\n"
+            f"{self.last_update - self.start_time},{self.bandwidth},{self.latency},{self.packet_loss_rate},{self.packet_corruption_rate},{self.bit_error_rate},{self.queue_limit},{self.packet_overhead},{self.max_packet_rate},{self.mtu},{self.fragment},{self.loss_reference_size}\n"
         )
 
     def close(self):
         self.file.close()
 
 
+PROVIDER_ATTRIBUTES = {
+    "bandwidth": "bandiwdth_provider",
+    "latency": "latency_provider",
+    "packet_loss_rate": "packet_loss_rate_provider",
+    "packet_corruption_rate": "packet_corruption_rate_provider",
+    "no_of_packet_corruptions": "no_of_packet_corruptions",
+    "bit_error_rate": "bit_error_rate_provider",
+    "queue_limit": "queue_limit_provider",
+    "packet_overhead": "packet_overhead_provider",
+    "max_packet_rate": "max_packet_rate_provider",
+    "mtu": "mtu_provider",
+    "fragment": "fragment_provider",
+    "loss_reference_size": "loss_reference_size_provider",
+}
+
+# Settings that are divided by and settings that are probabilities, every
+# other setting only has to be at least 0.
+POSITIVE_SETTINGS = ("bandwidth", "max_packet_rate", "mtu")
+RATE_SETTINGS = ("packet_loss_rate", "packet_corruption_rate", "bit_error_rate")
+
+
+def check_value(name: str, value: float):
+    if name in POSITIVE_SETTINGS:
+        valid = value > 0
+    elif name in RATE_SETTINGS:
+        valid = 0 <= value <= 1
+    else:
+        valid = value >= 0
+
+    if not valid:
+        raise ValueError(f"Invalid value {value} for {name}")
+
+
 Address = Tuple[str, int]
 
 
@@ -157,3 +291,6 @@ class Packet:
     data: bytes
     send_address: Address
     time: float | None = None
+    corrupted: bool = False
+    arrival_time: float | None = None
+    sequence: int = 0
@@ -0,0 +1,143 @@
+import csv
+import json
+import socket
+from time import monotonic
+from pathlib import Path
+from typing import Any, Dict, Tuple
+from common import (
+    ConstantProvider,
+    RandomExpovariate,
+    RandomGauss,
+    RandomGaussWithSpikes,
+    StepProvider,
+    Provider,
+    Settings,
+    Address,
+)
+
+PROVIDERS = {
+    provider.__name__: provider
+    for provider in (
+        ConstantProvider,
+        RandomExpovariate,
+        RandomGauss,
+        RandomGaussWithSpikes,
+        StepProvider,
+    )
+}
+
+Poll_Every = 0.01
+
+
+def create_provider(value: Any) -> Provider:
+    """
+    Creates a provider from a number, which becomes a ConstantProvider, or from
+    an object naming the provider in "type" with its arguments.
+    """
+
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return ConstantProvider(value)
+
+    if not isinstance(value, dict) or value.get("type") not in PROVIDERS:
+        raise ValueError(f"Invalid provider {value}")
+
+    arguments = {k: v for k, v in value.items() if k != "type"}
+    if value["type"] == "StepProvider":
+        arguments["steps"] = [tuple(step) for step in arguments.get("steps", [])]
+        # StepProvider skips steps without updates, so it would never return.
+        if len(arguments["steps"]) == 0 or any(
+            duration <= 0 for duration, _ in arguments["steps"]
+        ):
+            raise ValueError(f"Every step needs at least one update {value}")
+    return PROVIDERS[value["type"]](**arguments)
+
+
+def send_command(
+    address: Address, command: Dict[str, Any], timeout: float = 1
+) -> Dict[str, Any]:
+    """Sends a command to a running proxy and returns its reply."""
+
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.settimeout(timeout)
+        sock.sendto(json.dumps(command).encode(), address)
+        data, _ = sock.recvfrom(4096)
+        return json.loads(data)
+
+
+class ControlServer:
+    """
+    Changes the settings of a running proxy. Every datagram is a JSON object
+    mapping setting names to a provider, for example
+    {"latency": 0.05, "bandwidth": {"type": "RandomGauss", "seed": 0, "mean":
+    1048576, "stddev": 0}}. All providers of a command are applied together or
+    not at all, every command is logged to control.csv and answered with
+    {"ok": true} or {"ok": false, "error": ...}. Commands changing one of the
+    unsupported settings are rejected.
+    """
+
+    def __init__(
+        self,
+        address: Address,
+        folder: Path,
+        settings: Settings,
+        unsupported: Tuple[str, ...] = (),
+    ):
+        self.settings = settings
+        self.unsupported = unsupported
+        self.last_poll = 0.0
+
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(address)
+        self.socket.setblocking(False)
+
+        self.file = open(folder.joinpath("control.csv"), "w", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(["time", "command", "error"])
+
+    def poll(self):
+        if monotonic() - self.last_poll < Poll_Every:
+            return
+        self.last_poll = monotonic()
+
+        while True:
+            try:
+                data, address = self.socket.recvfrom(4096)
+            except BlockingIOError:
+                break
+            except ConnectionResetError:
+                # Windows reports an unreachable client on the next receive.
+                continue
+
+            error = ""
+            try:
+                command = json.loads(data)
+                if not isinstance(command, dict):
+                    raise ValueError("The command must be an object")
+                for name in command:
+                    if name in self.unsupported:
+                        raise ValueError(f"{name} is not supported")
+
+                self.settings.set_providers(
+                    {name: create_provider(value) for name, value in command.items()}
+                )
+            except Exception as e:
+                error = str(e)
+
+            self.writer.writerow(
+                [
+                    monotonic() - self.settings.start_time,
+                    data.decode(errors="replace"),
+                    error,
+                ]
+            )
+            self.file.flush()
+
+            reply = {"ok": True} if error == "" else {"ok": False, "error": error}
+            try:
+                self.socket.sendto(json.dumps(reply).encode(), address)
+            except BlockingIOError:
+                pass
+
+    def close(self):
+        self.socket.close()
+        self.file.close()
@@ -0,0 +1,121 @@
+import numpy as np
+from typing import List, Literal
+from common import Packet, Address
+from udp import SENDER_HEADER_SIZE, RECEIVER_HEADER_SIZE
+
+CorruptionTarget = Literal["All", "Header", "Data"]
+
+
+class BitErrorModel:
+    """
+    Flips every bit of a batch of packets independently with the bit error rate.
+    The header is the UdpSenderPacket.Header for packets sent to the receiver
+    and the UdpReceiverPacket.Header for packets sent back to the sender.
+
+    Bursts follow the spikes of RandomGaussWithSpikes but are counted in packets:
+    every packet starts a burst with burst_chance, which multiplies the bit
+    error rate of up to max_burst_length packets by burst_multiplier.
+    """
+
+    def __init__(
+        self,
+        seed: int,
+        receiver_address: Address,
+        target: CorruptionTarget = "All",
+        burst_chance: float = 0,
+        max_burst_length: int = 1,
+        burst_multiplier: float = 1,
+    ):
+        if target not in ("All", "Header", "Data"):
+            raise ValueError("Invalid corruption target")
+
+        self.rng = np.random.default_rng(seed)
+        self.receiver_address = receiver_address
+        self.target = target
+        self.burst_chance = burst_chance
+        self.max_burst_length = max_burst_length
+        self.burst_multiplier = burst_multiplier
+        self.burst_left = 0
+
+    def burst_mask(self, no_of_packets: int) -> np.ndarray:
+        mask = np.zeros(no_of_packets, dtype=bool)
+        mask[: self.burst_left] = True
+        consumed = min(self.burst_left, no_of_packets)
+        self.burst_left -= consumed
+
+        if self.burst_chance <= 0:
+            return mask
+
+        starts = np.flatnonzero(self.rng.random(no_of_packets) < self.burst_chance)
+        lengths = self.rng.integers(1, self.max_burst_length + 1, len(starts))
+        for start, length in zip(starts, lengths):
+            mask[start : start + length] = True
+            self.burst_left = max(self.burst_left, start + length - no_of_packets)
+
+        return mask
+
+    def corrupt(self, packets: List[Packet], bit_error_rate: float) -> int:
+        """Corrupts the packets in place and returns the number of flipped bits."""
+
+        if len(packets) == 0:
+            return 0
+
+        lengths = np.fromiter((len(p.data) for p in packets), np.int64, len(packets))
+        header_sizes = np.fromiter(
+            (
+                SENDER_HEADER_SIZE
+                if p.send_address == self.receiver_address
+                else RECEIVER_HEADER_SIZE
+                for p in packets
+            ),
+            np.int64,
+            len(packets),
+        )
+        if self.target == "Header":
+            start = np.zeros_like(lengths)
+            end = np.minimum(lengths, header_sizes)
+        elif self.target == "Data":
+            start = np.minimum(lengths, header_sizes)
+            end = lengths
+        else:
+            start = np.zeros_like(lengths)
+            end = lengths
+
+        rate = np.full(len(packets), bit_error_rate)
+        rate[self.burst_mask(len(packets))] *= self.burst_multiplier
+        np.clip(rate, 0, 1, out=rate)
+
+        no_of_bits = (end - start) * 8
+        errors = self.rng.binomial(no_of_bits, rate)
+        corrupted = np.flatnonzero(errors)
+        if len(corrupted) == 0:
+            return 0
+
+        # Flip all the errors of the batch in one buffer of the corrupted packets.
+        sizes = lengths[corrupted]
+        offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        buffer = np.frombuffer(
+            b"".join(packets[i].data for i in corrupted), dtype=np.uint8
+        ).copy()
+
+        counts = errors[corrupted]
+        owner = np.repeat(np.arange(len(corrupted)), counts)
+        # Distinct bits per packet, so no two errors cancel each other out and
+        # every packet marked as corrupted differs from the original.
+        bits = np.concatenate(
+            [
+                start[i] * 8 + self.rng.choice(no_of_bits[i], errors[i], replace=False)
+                for i in corrupted
+            ]
+        )
+        np.bitwise_xor.at(
+            buffer,
+            offsets[owner] + bits // 8,
+            np.left_shift(1, bits % 8).astype(np.uint8),
+        )
+
+        for i, offset, size in zip(corrupted, offsets, sizes):
+            packets[i].data = buffer[offset : offset + size].tobytes()
+            packets[i].corrupted = True
+
+        return int(counts.sum())
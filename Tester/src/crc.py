@@ -0,0 +1,231 @@
+import signal
+import multiprocessing
+import numpy as np
+from queue import Empty
+from time import monotonic
+from pathlib import Path
+from typing import List, Tuple
+from common import Packet, Address, Settings
+from udp import (
+    CRC,
+    U16,
+    SENDER_HEADER_SIZE,
+    SENDER_CRC_OFFSET,
+    SENDER_SIZE_OFFSET,
+    RECEIVER_HEADER_SIZE,
+    RECEIVER_CRC_OFFSET,
+    RECEIVER_NO_OF_NACKS_OFFSET,
+    NACK_SIZE,
+)
+
+try:
+    # Optional C implementation, the NumPy table is used when it is missing.
+    import crc32c as crc32c_library  # type: ignore
+except ImportError:
+    crc32c_library = None
+
+Poll_Timeout = 0.1
+
+# time, data, to_receiver, corrupted
+Batch = Tuple[float, List[bytes], List[bool], List[bool]]
+
+
+def create_table() -> np.ndarray:
+    table = np.arange(256, dtype=np.uint32)
+    for _ in range(8):
+        table = np.where(table & 1, (table >> 1) ^ np.uint32(0x82F63B78), table >> 1)
+    return table.astype(np.uint32)
+
+
+CRC32C_TABLE = create_table()
+
+
+def crc32c_batch(buffers: List[bytes]) -> np.ndarray:
+    """Computes the CRC32C (Crc32Iscsi) of every buffer."""
+
+    if crc32c_library is not None:
+        return np.fromiter(
+            (crc32c_library.crc32c(buffer) for buffer in buffers),
+            np.uint32,
+            len(buffers),
+        )
+
+    lengths = np.fromiter((len(b) for b in buffers), np.int64, len(buffers))
+    order = np.argsort(-lengths, kind="stable")
+    max_length = int(lengths.max(initial=0))
+
+    # One row per buffer, longest first, so the buffers still being processed
+    # at a byte index are always a prefix of the rows.
+    data = np.zeros((len(buffers), max_length), dtype=np.uint8)
+    for row, i in enumerate(order):
+        data[row, : lengths[i]] = np.frombuffer(buffers[i], dtype=np.uint8)
+
+    sorted_lengths = lengths[order]
+    crc = np.full(len(buffers), 0xFFFFFFFF, dtype=np.uint32)
+    active = len(buffers)
+    for column in range(max_length):
+        while sorted_lengths[active - 1] <= column:
+            active -= 1
+        current = crc[:active]
+        crc[:active] = CRC32C_TABLE[(current ^ data[:active, column]) & 0xFF] ^ (
+            current >> 8
+        )
+
+    result = np.empty_like(crc)
+    result[order] = crc ^ np.uint32(0xFFFFFFFF)
+    return result
+
+
+def sender_crc_input(data: bytes) -> bytes | None:
+    if len(data) < SENDER_HEADER_SIZE:
+        return None
+
+    (size,) = U16.unpack_from(data, SENDER_SIZE_OFFSET)
+    # UdpSenderPacket.deserialize does not copy the data of a packet that is
+    # shorter than its size, so it can not pass isValid.
+    if SENDER_HEADER_SIZE + size > len(data):
+        return None
+
+    return (
+        data[:SENDER_CRC_OFFSET]
+        + bytes(CRC.size)
+        + data[SENDER_CRC_OFFSET + CRC.size : SENDER_HEADER_SIZE + size]
+    )
+
+
+def receiver_crc_input(data: bytes) -> bytes | None:
+    if len(data) < RECEIVER_HEADER_SIZE:
+        return None
+
+    nack_size = data[RECEIVER_NO_OF_NACKS_OFFSET] * NACK_SIZE
+    if RECEIVER_HEADER_SIZE + nack_size > len(data):
+        return None
+
+    return (
+        data[:RECEIVER_CRC_OFFSET]
+        + bytes(CRC.size)
+        + data[RECEIVER_CRC_OFFSET + CRC.size : RECEIVER_HEADER_SIZE + nack_size]
+    )
+
+
+def verify_batch(data: List[bytes], to_receiver: List[bool]) -> np.ndarray:
+    """Returns whether the CRC of every packet is valid, malformed ones are not."""
+
+    inputs: List[bytes] = []
+    expected: List[int] = []
+    valid = np.zeros(len(data), dtype=bool)
+    checked: List[int] = []
+
+    for i, packet_data in enumerate(data):
+        if to_receiver[i]:
+            crc_input = sender_crc_input(packet_data)
+            crc_offset = SENDER_CRC_OFFSET
+        else:
+            crc_input = receiver_crc_input(packet_data)
+            crc_offset = RECEIVER_CRC_OFFSET
+
+        if crc_input is None:
+            continue
+
+        inputs.append(crc_input)
+        expected.append(CRC.unpack_from(packet_data, crc_offset)[0])
+        checked.append(i)
+
+    if len(inputs) > 0:
+        valid[checked] = crc32c_batch(inputs) == np.array(expected, np.uint32)
+    return valid
+
+
+def verify_loop(queue: "multiprocessing.Queue[Batch | None]", folder: Path):
+    # Ctrl+C is handled by the proxy, which sends the last batch on close.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    forwarded = injected = detectable = undetectable = invalid_uncorrupted = 0
+    parent = multiprocessing.parent_process()
+
+    with open(folder.joinpath("crc.csv"), "w") as file:
+        file.write(
+            "time,forwarded,injected,detectable,undetectable,invalid_uncorrupted\n"
+        )
+
+        while parent is None or parent.is_alive():
+            try:
+                batch = queue.get(timeout=Poll_Timeout)
+            except Empty:
+                continue
+            if batch is None:
+                break
+
+            time, data, to_receiver, corrupted_list = batch
+            valid = verify_batch(data, to_receiver)
+            corrupted = np.array(corrupted_list, dtype=bool)
+
+            forwarded += len(data)
+            injected += int(corrupted.sum())
+            detectable += int((corrupted & ~valid).sum())
+            undetectable += int((corrupted & valid).sum())
+            invalid_uncorrupted += int((~corrupted & ~valid).sum())
+
+            file.write(
+                f"{time},{forwarded},{injected},{detectable},{undetectable},{invalid_uncorrupted}\n"
+            )
+            file.flush()
+
+
+class CrcVerifier:
+    """
+    Checks the CRC32C of the forwarded packets in batches, the same way
+    UdpSenderPacket.isValid and UdpReceiverPacket.isValid do, and writes the
+    running counts to crc.csv.
+
+    Injected corruptions are split into detectable ones, which the receiver
+    drops, and undetectable ones, which pass the CRC check. The batches are
+    checked in a separate process so the proxy does not wait for them.
+    """
+
+    def __init__(
+        self,
+        folder: Path,
+        receiver_address: Address,
+        settings: Settings,
+        batch_size: int = 1024,
+    ):
+        self.receiver_address = receiver_address
+        self.settings = settings
+        self.batch_size = batch_size
+        self.data: List[bytes] = []
+        self.to_receiver: List[bool] = []
+        self.corrupted: List[bool] = []
+
+        self.queue: "multiprocessing.Queue[Batch | None]" = multiprocessing.Queue()
+        self.process = multiprocessing.Process(
+            target=verify_loop, args=(self.queue, folder), daemon=True
+        )
+        self.process.start()
+
+    def add(self, packet: Packet):
+        self.data.append(packet.data)
+        self.to_receiver.append(packet.send_address == self.receiver_address)
+        self.corrupted.append(packet.corrupted)
+        if len(self.data) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if len(self.data) == 0:
+            return
+
+        self.queue.put(
+            (
+                monotonic() - self.settings.start_time,
+                self.data,
+                self.to_receiver,
+                self.corrupted,
+            )
+        )
+        self.data = []
+        self.to_receiver = []
+        self.corrupted = []
+
+    def close(self):
+        self.flush()
+        self.queue.put(None)
+        self.process.join()
@@ -0,0 +1,110 @@
+import struct
+import threading
+import numpy as np
+from time import sleep
+from pathlib import Path
+from common import Packet, Address, Settings
+
+FORWARDED = 1
+LOST = 2
+QUEUE_DROPPED = 4
+CORRUPTED = 8
+MTU_DROPPED = 16
+
+TO_RECEIVER = 0
+TO_SENDER = 1
+
+# Times are in seconds since the start of the run, release is NaN for packets
+# that were not forwarded.
+EVENT = struct.Struct("<ddIHBB")
+EVENT_DTYPE = np.dtype(
+    [
+        ("arrival", "<f8"),
+        ("release", "<f8"),
+        ("sequence", "<u4"),
+        ("size", "<u2"),
+        ("decision", "u1"),
+        ("direction", "u1"),
+    ]
+)
+assert EVENT_DTYPE.itemsize == EVENT.size
+
+Flush_Every = 0.1
+
+
+def load_events(path: Path) -> np.ndarray:
+    return np.memmap(path, dtype=EVENT_DTYPE, mode="r")
+
+
+class EventLog:
+    """
+    Records the fate of every packet as a fixed size record in an in memory ring,
+    a background thread appends the records to events.bin which load_events
+    maps as a NumPy array. Records that find the ring full are counted in
+    overflowed instead of blocking the proxy.
+    """
+
+    def __init__(
+        self,
+        folder: Path,
+        receiver_address: Address,
+        settings: Settings,
+        capacity: int = 2**16,
+    ):
+        self.receiver_address = receiver_address
+        self.settings = settings
+        self.capacity = capacity
+        self.buffer = bytearray(capacity * EVENT.size)
+        self.written = 0
+        self.flushed = 0
+        self.overflowed = 0
+
+        self.file = open(folder.joinpath("events.bin"), "wb")
+        self.running = True
+        self.thread = threading.Thread(target=self.flush_loop, daemon=True)
+        self.thread.start()
+
+    def log(self, packet: Packet, decision: int, release: float = float("nan")):
+        if self.written - self.flushed >= self.capacity:
+            self.overflowed += 1
+            return
+
+        EVENT.pack_into(
+            self.buffer,
+            (self.written % self.capacity) * EVENT.size,
+            (packet.arrival_time or 0) - self.settings.start_time,
+            release - self.settings.start_time,
+            packet.sequence & 0xFFFFFFFF,
+            len(packet.data),
+            decision | (CORRUPTED if packet.corrupted else 0),
+            TO_RECEIVER if packet.send_address == self.receiver_address else TO_SENDER,
+        )
+        self.written += 1
+
+    def flush(self):
+        written = self.written
+        if written == self.flushed:
+            return
+
+        start = (self.flushed % self.capacity) * EVENT.size
+        end = (written % self.capacity) * EVENT.size
+        if start < end:
+            self.file.write(self.buffer[start:end])
+        else:
+            self.file.write(self.buffer[start:] + self.buffer[:end])
+        self.file.flush()
+        self.flushed = written
+
+    def flush_loop(self):
+        while self.running:
+            sleep(Flush_Every)
+            self.flush()
+
+    def close(self):
+        self.running = False
+        self.thread.join()
+        self.flush()
+        self.file.close()
+
+        if self.overflowed > 0:
+            print(f"The event log overflowed, {self.overflowed} events were not logged")
@@ -0,0 +1,74 @@
+from time import monotonic
+from pathlib import Path
+from common import Packet, Settings
+
+Write_Every = 0.5
+
+
+class LatencyErrorMonitor:
+    """
+    Measures the delay the proxy loop adds to the packets. The receive delay is
+    the time from the arrival of a datagram to the moment the loop scheduled
+    it, which is not added to the latency as long as it is shorter than the
+    latency. The release error is the time from the scheduled release to the
+    moment the packet was sent, which is. The mean and maximum of both over
+    every interval are written to latency_error.csv in seconds.
+    """
+
+    def __init__(self, folder: Path, settings: Settings):
+        self.settings = settings
+        self.last_write = monotonic()
+
+        self.file = open(folder.joinpath("latency_error.csv"), "w")
+        self.file.write(
+            "time,packets,mean_receive_delay,max_receive_delay,mean_release_error,max_release_error\n"
+        )
+        self.reset()
+
+    def reset(self):
+        self.scheduled_packets = 0
+        self.receive_delay = 0.0
+        self.max_receive_delay = 0.0
+        self.released_packets = 0
+        self.release_error = 0.0
+        self.max_release_error = 0.0
+
+    def scheduled(self, packet: Packet):
+        if packet.arrival_time is None:
+            return
+
+        delay = monotonic() - packet.arrival_time
+        self.scheduled_packets += 1
+        self.receive_delay += delay
+        self.max_receive_delay = max(self.max_receive_delay, delay)
+
+    def released(self, packet: Packet):
+        if packet.time is None:
+            return
+
+        error = max(monotonic() - packet.time, 0)
+        self.released_packets += 1
+        self.release_error += error
+        self.max_release_error = max(self.max_release_error, error)
+
+    def poll(self):
+        if monotonic() - self.last_write < Write_Every:
+            return
+        self.write()
+
+    def write(self):
+        self.last_write = monotonic()
+        if self.scheduled_packets == 0 and self.released_packets == 0:
+            return
+
+        mean_receive_delay = self.receive_delay / max(self.scheduled_packets, 1)
+        mean_release_error = self.release_error / max(self.released_packets, 1)
+        self.file.write(
+            f"{self.last_write - self.settings.start_time},{self.released_packets},{mean_receive_delay},{self.max_receive_delay},{mean_release_error},{self.max_release_error}\n"
+        )
+        self.file.flush()
+        self.reset()
+
+    def close(self):
+        self.write()
+        self.file.close()
@@ -1,189 +1,66 @@
 import time
-import socket
 import argparse
 from pathlib import Path
-from collections import deque
 from random import Random
-from typing import Deque, List, Literal
-from common import (
-    ConstantProvider,
-    RandomExpovariate,
-    RandomGauss,
-    RandomGaussWithSpikes,
-    Settings,
-    Packet,
-    Address,
-)
+from crc import CrcVerifier
+from adaptation import AdaptationBenchmark
+from control import ControlServer
+from events import EventLog
+from overflow import OverflowMonitor, Max_Unintended_Loss
+from latency import LatencyErrorMonitor
+from proxy import Application
+from pipeline import run_pipeline
+from netem import NetemBackend, Namespace, Namespace_Ip, Unsupported_Settings
+from scenarios import create_settings, create_bit_error_model, Update_Every
 
-
-class Application:
-    def __init__(
-        self,
-        listen_address: Address,
-        addresses: List[Address],
-        rng: Random,
-        settings: Settings,
-    ):
-        self.listen_address = listen_address
-        self.addresses = addresses
-        self.rng = rng
-        self.settings = settings
-
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.socket.bind(self.listen_address)
-        self.socket.setblocking(False)
-
-        self.unsorted_packet_recieve_list: List[Packet] = []
-        self.unsorted_packet_send_list: List[Packet] = []
-
-        self.latency_queue: Deque[Packet] = deque()
-        self.packet_to_be_sent: Packet | None = None
-
-        self.started = False
-
-    def run(self):
-        while True:
-            self.send_packets()
-            self.settings.update(self.started)
-            self.receive_packets()
-            self.settings.update(self.started)
-            self.add_to_latency_queue()
-            self.settings.update(self.started)
-            self.promote_packet_to_be_sent()
-            self.settings.update(self.started)
-
-    def corrupt_data(self, packet: Packet):
-        i = self.rng.randint(0, len(packet.data) - 1)
-        b = packet.data[i] ^ (1 << self.rng.randint(0, 7))
-        packet.data = packet.data[:i] + bytes([b]) + packet.data[i + 1 :]
-
-    def send_packets(self):
-        while len(self.unsorted_packet_send_list) > 0:
-            try:
-                packet = self.unsorted_packet_send_list[-1]
-                corruption_rate = self.settings.packet_corruption_rate
-                if self.rng.random() < corruption_rate:
-                    no_of_corruptions = self.settings.no_of_packet_corruptions.get_int()
-                    for _ in range(no_of_corruptions):
-                        self.corrupt_data(packet)
-
-                self.socket.sendto(packet.data, packet.send_address)
-                self.unsorted_packet_send_list.pop()
-            except BlockingIOError:
-                break
-
-    def receive_packets(self):
-        while True:
-            try:
-                data, address = self.socket.recvfrom(4096)
-                self.started = True
-
-                if address not in self.addresses:
-                    self.addresses.append(address)
-
-                send_address = (
-                    self.addresses[0]
-                    if address == self.addresses[1]
-                    else self.addresses[1]
-                )
-                self.unsorted_packet_recieve_list.append(Packet(data, send_address))
-            except BlockingIOError:
-                break
-
-    def add_to_latency_queue(self):
-        while len(self.unsorted_packet_recieve_list) > 0:
-            length_of_packet_list = len(self.unsorted_packet_recieve_list)
-            choice = self.rng.randint(0, length_of_packet_list - 1)
-            if choice == length_of_packet_list - 1:
-                packet = self.unsorted_packet_recieve_list.pop()
-            else:
-                packet = self.unsorted_packet_recieve_list[choice]
-                self.unsorted_packet_recieve_list[choice] = (
-                    self.unsorted_packet_recieve_list[-1]
-                )
-                self.unsorted_packet_recieve_list.pop()
-
-            packet_loss_rate = self.settings.packet_loss_rate
-            rand = self.rng.random()
-
-            if rand < packet_loss_rate:
-                continue
-            packet.time = time.time() + self.settings.latency
-
-            self.latency_queue.appendleft(packet)
-
-    def promote_packet_to_be_sent(self):
-        # Check if the packet_to_be_sent is set. If not set it.
-        if self.packet_to_be_sent is not None:
-            # Check if the packet_to_be_sent can be sent.
-            if (
-                self.packet_to_be_sent.time is not None
-                and time.time() >= self.packet_to_be_sent.time
-            ):
-                # Send packet
-                self.unsorted_packet_send_list.append(self.packet_to_be_sent)
-                self.packet_to_be_sent = None
-            else:
-                return
-
-        if len(self.latency_queue) == 0:
-            return
-
-        if (
-            self.latency_queue[-1].time is not None
-            and time.time() >= self.latency_queue[-1].time
-        ):
-            packet = self.latency_queue.pop()
-            packet.time = (len(packet.data) / self.settings.bandwidth) + time.time()
-
-            self.packet_to_be_sent = packet
-
-
-"""
-Best
-    Bandwidth: 15MB/s +- 2MB/s
-    Latency: 10ms +- 5ms
-    Packet Loss Rate: 0%
-    Packet Corruption Rate: 0%
-    No of Packet Corruptions: 0
-
-Average
-    Bandwidth: 10MB/s +- 2MB/s with spikes up to 5MB/s
-    Latency: 60ms +- 10ms with spikes up to 90ms
-    Packet Loss Rate: 2.5% +- 2.5% with spikes up to 7.5%
-    Packet Corruption Rate: 1% +- 1% with spikes up to 3%
-    No of Packet Corruptions: ExpoVariate(2)
-
-Worst
-    Bandwidth: 5MB/s +- 2MB/s
-    Latency: 100ms +- 20ms
-    Packet Loss Rate: 10% 
-    Packet Corruption Rate: 5%
-    No of Packet Corruptions: ExpoVariate(2)
-"""
-
-Scenario: Literal["Best", "Average", "Worst", "Testing"] = "Average"
-Spike_Chance = 0.005
-Spike_Duration = 30
 Seed = 0
-Update_Every = 0.5
 Project_Name = "Test"
 
 
 if __name__ == "__main__":
-    main_rng = Random(Seed)
-
     parser = argparse.ArgumentParser()
     parser.add_argument("--scenario", type=str, default=None)
     parser.add_argument("--project", type=str, default=None)
+    parser.add_argument("--pipeline", action="store_true")
+    parser.add_argument(
+        "--bit-errors", type=str, default=None, choices=["All", "Header", "Data"]
+    )
+    parser.add_argument("--verify-crc", action="store_true")
+    parser.add_argument("--benchmark-adaptation", action="store_true")
+    parser.add_argument("--control-port", type=int, default=None)
+    parser.add_argument("--event-log", action="store_true")
+    parser.add_argument("--netem", action="store_true")
+    parser.add_argument(
+        "--max-unintended-loss", type=float, default=Max_Unintended_Loss
+    )
+    parser.add_argument("--seed", type=int, default=Seed)
+    parser.add_argument("--listen-port", type=int, default=2003)
+    parser.add_argument("--receiver-port", type=int, default=2004)
 
     args = parser.parse_args()
 
+    if args.netem:
+        # The kernel shapes the packets, so nothing sees them in Python.
+        for enabled, option in (
+            (args.pipeline, "--pipeline"),
+            (args.bit_errors is not None, "--bit-errors"),
+            (args.event_log, "--event-log"),
+            (args.verify_crc, "--verify-crc"),
+            (args.benchmark_adaptation, "--benchmark-adaptation"),
+        ):
+            if enabled:
+                parser.error(f"--netem can not be combined with {option}")
+
     if args.scenario is None or args.project is None:
         raise ValueError("Please provide a scenario and project name")
 
     Project_Name = args.project
     Scenario = args.scenario
+    Seed = args.seed
+    Listen_Address = ("127.0.0.1", args.listen_port)
+    Receiver_Address = ("127.0.0.1", args.receiver_port)
+
+    main_rng = Random(Seed)
 
     if Project_Name == "Test":
         Run = Path(f"./Runs/Test-{time.time_ns()}")
@@ -192,107 +69,114 @@ if __name__ == "__main__":
 
     Run.mkdir(parents=True, exist_ok=True)
 
-    if Scenario == "Best":
-        settings = Settings(
+    control_address = (
+        None if args.control_port is None else ("127.0.0.1", args.control_port)
+    )
+
+    print("Running Scenario:", Scenario)
+
+    if args.pipeline:
+        run_pipeline(
+            listen_address=Listen_Address,
+            addresses=[Receiver_Address],
+            seed=Seed,
+            scenario=Scenario,
             folder=Run.joinpath(Scenario),
             update_every=Update_Every,
-            bandwidth=RandomGauss(
-                seed=main_rng.randint(0, 10**5),
-                mean=15 * 1024 * 1024,
-                stddev=1 * 1024 * 1024,
-            ),
-            latency=RandomGauss(
-                seed=main_rng.randint(0, 10**5),
-                mean=10 / 1000,
-                stddev=2.5 / 1000,
-            ),
-            packet_loss_rate=ConstantProvider(0),
-            packet_corruption_rate=ConstantProvider(0),
-            no_of_packet_corruptions=ConstantProvider(0),
+            bit_errors=args.bit_errors,
+            verify_crc=args.verify_crc,
+            benchmark_adaptation=args.benchmark_adaptation,
+            control_address=control_address,
+            event_log=args.event_log,
+            max_unintended_loss=args.max_unintended_loss,
         )
-    elif Scenario == "Average":
-        settings = Settings(
-            folder=Run.joinpath(Scenario),
-            update_every=Update_Every,
-            bandwidth=RandomGaussWithSpikes(
-                seed=main_rng.randint(0, 10**5),
-                mean=10 * 1024 * 1024,
-                stddev=1 * 1024 * 1024,
-                spike_multiplier=0.5,
-                spike_chance=Spike_Chance,
-                max_spike_duration=Spike_Duration,
-            ),
-            latency=RandomGaussWithSpikes(
-                seed=main_rng.randint(0, 10**5),
-                mean=60 / 1000,
-                stddev=5 / 1000,
-                spike_multiplier=1.5,
-                spike_chance=Spike_Chance,
-                max_spike_duration=Spike_Duration,
-            ),
-            packet_loss_rate=RandomGaussWithSpikes(
-                seed=main_rng.randint(0, 10**5),
-                mean=2.5 / 100,
-                stddev=1.25 / 100,
-                spike_multiplier=3,
-                spike_chance=Spike_Chance,
-                max_spike_duration=Spike_Duration,
-            ),
-            packet_corruption_rate=RandomGaussWithSpikes(
-                seed=main_rng.randint(0, 10**5),
-                mean=1 / 100,
-                stddev=0.5 / 100,
-                spike_multiplier=3,
-                spike_chance=Spike_Chance,
-                max_spike_duration=Spike_Duration,
-            ),
-            no_of_packet_corruptions=RandomExpovariate(
-                seed=main_rng.randint(0, 10**5),
-                lam=2.5,
-                start_value=1,
-            ),
+        raise SystemExit(0)
+
+    if args.netem:
+        settings = create_settings(Scenario, Run.joinpath(Scenario), main_rng)
+        control = (
+            None
+            if control_address is None
+            else ControlServer(
+                control_address,
+                Run.joinpath(Scenario),
+                settings,
+                unsupported=Unsupported_Settings,
+            )
         )
-    elif Scenario == "Worst":
-        settings = Settings(
-            folder=Run.joinpath(Scenario),
-            update_every=Update_Every,
-            bandwidth=RandomGauss(
-                seed=main_rng.randint(0, 10**5),
-                mean=5 * 1024 * 1024,
-                stddev=1 * 1024 * 1024,
-            ),
-            latency=RandomGauss(
-                seed=main_rng.randint(0, 10**5),
-                mean=100 / 1000,
-                stddev=10 / 1000,
-            ),
-            packet_loss_rate=ConstantProvider(10 / 100),
-            packet_corruption_rate=ConstantProvider(5 / 100),
-            no_of_packet_corruptions=RandomExpovariate(
-                seed=main_rng.randint(0, 10**5),
-                lam=2.5,
-                start_value=1,
-            ),
-        )
-    elif Scenario == "Testing":
-        settings = Settings(
-            folder=Run.joinpath(Scenario),
-            update_every=Update_Every,
-            bandwidth=ConstantProvider(10**5),
-            latency=ConstantProvider(1000 / 1000),
-            packet_loss_rate=ConstantProvider(0),
-            packet_corruption_rate=ConstantProvider(0),
-            no_of_packet_corruptions=ConstantProvider(0),
+        try:
+            backend = NetemBackend(settings, control)
+            print(
+                f"Send to {Namespace_Ip}:{args.receiver_port}, the receiver has to run in the {Namespace} namespace"
+            )
+            try:
+                backend.run()
+            finally:
+                backend.close()
+        finally:
+            settings.close()
+            if control is not None:
+                control.close()
+        raise SystemExit(0)
+
+    settings = create_settings(
+        Scenario, Run.joinpath(Scenario), main_rng, args.bit_errors is not None
+    )
+    bit_errors = (
+        None
+        if args.bit_errors is None
+        else create_bit_error_model(
+            Scenario, main_rng, args.bit_errors, Receiver_Address
         )
-    else:
-        raise ValueError("Invalid Scenario")
-
-    print("Running Scenario:", Scenario)
+    )
+    crc = (
+        CrcVerifier(Run.joinpath(Scenario), Receiver_Address, settings)
+        if args.verify_crc
+        else None
+    )
+    adaptation = (
+        AdaptationBenchmark(Run.joinpath(Scenario), Receiver_Address, settings)
+        if args.benchmark_adaptation
+        else None
+    )
+    control = (
+        None
+        if control_address is None
+        else ControlServer(control_address, Run.joinpath(Scenario), settings)
+    )
+    events = (
+        EventLog(Run.joinpath(Scenario), Receiver_Address, settings)
+        if args.event_log
+        else None
+    )
+    overflow = OverflowMonitor(
+        Run.joinpath(Scenario), Listen_Address, args.max_unintended_loss
+    )
+    latency_error = LatencyErrorMonitor(Run.joinpath(Scenario), settings)
     app = Application(
-        listen_address=("127.0.0.1", 2003),
-        addresses=[("127.0.0.1", 2004)],
+        listen_address=Listen_Address,
+        addresses=[Receiver_Address],
         rng=main_rng,
         settings=settings,
+        bit_errors=bit_errors,
+        crc=crc,
+        adaptation=adaptation,
+        control=control,
+        events=events,
+        overflow=overflow,
+        latency_error=latency_error,
     )
-    app.run()
-    settings.close()
+    try:
+        app.run()
+    finally:
+        settings.close()
+        if crc is not None:
+            crc.close()
+        if adaptation is not None:
+            adaptation.close()
+        if control is not None:
+            control.close()
+        if events is not None:
+            events.close()
+        overflow.close()
+        latency_error.close()
@@ -0,0 +1,202 @@
+import math
+import time
+import subprocess
+from typing import List
+from common import Settings, PROVIDER_ATTRIBUTES
+from control import ControlServer, Poll_Every
+
+Namespace = "uav-tester"
+Host_Interface = "uav0"
+Namespace_Interface = "uav1"
+Host_Ip = "10.200.0.1"
+Namespace_Ip = "10.200.0.2"
+Prefix_Length = 24
+
+# netem holds the packets of the latency queue, tbf the packets waiting for
+# bandwidth. The Python proxy has no limit on the latter, so tbf drops only
+# packets that would have waited longer than this.
+Default_Queue_Limit = 1000
+Max_Queue_Delay = 1.0
+Min_Burst = 16 * 1024
+
+# Settings tc does not apply. Scenarios and commands setting them are rejected
+# so data.csv only holds values that were applied.
+Unsupported_Settings = (
+    "bit_error_rate",
+    "max_packet_rate",
+    "mtu",
+    "fragment",
+    "loss_reference_size",
+)
+
+
+def run_command(command: List[str], namespace: str | None = None, check: bool = True):
+    if namespace is not None:
+        command = ["ip", "netns", "exec", namespace] + command
+
+    result = subprocess.run(command, capture_output=True, text=True)
+    if check and result.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)} failed: {result.stderr.strip()}")
+
+
+class NetemBackend:
+    """
+    Applies the settings with tc on a veth pair between the host and a network
+    namespace instead of forwarding the packets in Python. The receiver runs in
+    the namespace and the sender sends to it directly, both directions are
+    shaped by a netem qdisc for latency, loss and corruption with a tbf child
+    for the bandwidth. The qdiscs are replaced on every settings update and the
+    values are logged to data.csv as usual.
+
+    netem corrupts a single bit of a packet, so no_of_packet_corruptions is not
+    applied. Of the link model only the packet overhead is applied, by tbf, the
+    other Unsupported_Settings raise a ValueError.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        control: ControlServer | None = None,
+        namespace: str = Namespace,
+    ):
+        for name in Unsupported_Settings:
+            if getattr(settings, PROVIDER_ATTRIBUTES[name]) is not None:
+                raise ValueError(f"{name} can not be applied with netem")
+
+        self.settings = settings
+        self.control = control
+        self.namespace = namespace
+        self.interfaces = [
+            (Host_Interface, None),
+            (Namespace_Interface, namespace),
+        ]
+
+        self.create_namespace()
+
+    def create_namespace(self):
+        # A run that was killed leaves the namespace and the veth pair behind,
+        # which would make adding them fail.
+        self.delete_namespace()
+        try:
+            self.add_namespace()
+        except RuntimeError:
+            self.delete_namespace()
+            raise
+
+    def delete_namespace(self):
+        run_command(["ip", "netns", "del", self.namespace], check=False)
+        run_command(["ip", "link", "del", Host_Interface], check=False)
+
+    def add_namespace(self):
+        run_command(["ip", "netns", "add", self.namespace])
+        run_command(
+            [
+                "ip",
+                "link",
+                "add",
+                Host_Interface,
+                "type",
+                "veth",
+                "peer",
+                "name",
+                Namespace_Interface,
+                "netns",
+                self.namespace,
+            ]
+        )
+        run_command(
+            ["ip", "addr", "add", f"{Host_Ip}/{Prefix_Length}", "dev", Host_Interface]
+        )
+        run_command(["ip", "link", "set", Host_Interface, "up"])
+        run_command(
+            [
+                "ip",
+                "addr",
+                "add",
+                f"{Namespace_Ip}/{Prefix_Length}",
+                "dev",
+                Namespace_Interface,
+            ],
+            self.namespace,
+        )
+        run_command(["ip", "link", "set", Namespace_Interface, "up"], self.namespace)
+        run_command(["ip", "link", "set", "lo", "up"], self.namespace)
+
+    def netem_arguments(self) -> List[str]:
+        limit = (
+            Default_Queue_Limit
+            if math.isinf(self.settings.queue_limit)
+            else max(int(self.settings.queue_limit), 1)
+        )
+        return [
+            "netem",
+            "limit",
+            str(limit),
+            "delay",
+            f"{self.settings.latency * 10**6:.0f}us",
+            "loss",
+            f"{self.settings.packet_loss_rate * 100:.6f}%",
+            "corrupt",
+            f"{self.settings.packet_corruption_rate * 100:.6f}%",
+        ]
+
+    def tbf_arguments(self) -> List[str]:
+        bandwidth = max(self.settings.bandwidth, 1)
+        return [
+            "tbf",
+            "rate",
+            f"{bandwidth * 8:.0f}bit",
+            "burst",
+            str(max(int(bandwidth / 100), Min_Burst)),
+            "latency",
+            f"{Max_Queue_Delay * 1000:.0f}ms",
+            "overhead",
+            str(int(self.settings.packet_overhead)),
+        ]
+
+    def apply(self):
+        for interface, namespace in self.interfaces:
+            run_command(
+                ["tc", "qdisc", "replace", "dev", interface, "root", "handle", "1:"]
+                + self.netem_arguments(),
+                namespace,
+            )
+            run_command(
+                [
+                    "tc",
+                    "qdisc",
+                    "replace",
+                    "dev",
+                    interface,
+                    "parent",
+                    "1:1",
+                    "handle",
+                    "10:",
+                ]
+                + self.tbf_arguments(),
+                namespace,
+            )
+
+    def run(self):
+        self.settings.update(False)
+        self.apply()
+
+        while True:
+            remaining = (
+                self.settings.last_update
+                + self.settings.update_every
+                - time.monotonic()
+            )
+            if self.control is not None:
+                remaining = min(remaining, Poll_Every)
+            time.sleep(max(remaining, 0.001))
+
+            last_update = self.settings.last_update
+            if self.control is not None:
+                self.control.poll()
+            self.settings.update(True)
+            if self.settings.last_update != last_update:
+                self.apply()
+
+    def close(self):
+        run_command(["ip", "netns", "del", self.namespace])
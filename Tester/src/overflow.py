@@ -0,0 +1,122 @@
+import os
+import socket
+import struct
+from time import monotonic
+from pathlib import Path
+from common import Address
+
+Socket_Buffer_Size = 8 * 1024 * 1024
+Check_Every = 0.5
+# Unintended loss above this fraction of the received datagrams stops the run,
+# once enough datagrams were received for the fraction to mean something.
+Max_Unintended_Loss = 0.01
+Min_Received = 1000
+
+UDP_TABLE = "/proc/net/udp"
+
+
+def size_buffers(sock: socket.socket):
+    """Asks for large socket buffers and warns if the kernel gives less."""
+
+    for option, name, limit in (
+        (socket.SO_RCVBUF, "receive", "net.core.rmem_max"),
+        (socket.SO_SNDBUF, "send", "net.core.wmem_max"),
+    ):
+        sock.setsockopt(socket.SOL_SOCKET, option, Socket_Buffer_Size)
+        size = sock.getsockopt(socket.SOL_SOCKET, option)
+        if size < Socket_Buffer_Size:
+            print(
+                f"The {name} buffer is {size} bytes instead of {Socket_Buffer_Size}, raise {limit} to avoid drops"
+            )
+
+
+def read_kernel_drops(address: Address) -> int:
+    """Returns the drops of the socket bound to the address from /proc/net/udp."""
+
+    # The address is printed as the 32 bit integer in host byte order.
+    (ip,) = struct.unpack("=I", socket.inet_aton(address[0]))
+    local_address = f"{ip:08X}:{address[1]:04X}"
+
+    with open(UDP_TABLE) as file:
+        next(file)
+        for line in file:
+            fields = line.split()
+            if fields[1] == local_address:
+                return int(fields[-1])
+    return 0
+
+
+class OverflowMonitor:
+    """
+    Counts the datagrams the proxy lost itself, which would otherwise look like
+    emulated packet loss: datagrams the kernel dropped because the receive
+    buffer was full and datagrams dropped because the ingress ring was full.
+    The counts are written to overflow.csv and the run fails once they exceed
+    max_unintended_loss of the received datagrams.
+
+    The kernel drops of the socket bound to the listen address are read from
+    /proc/net/udp, so they are only counted on Linux.
+    """
+
+    def __init__(
+        self,
+        folder: Path,
+        listen_address: Address,
+        max_unintended_loss: float = Max_Unintended_Loss,
+    ):
+        self.listen_address = listen_address
+        self.max_unintended_loss = max_unintended_loss
+        self.start_time = monotonic()
+        self.last_check = self.start_time
+
+        self.kernel_counters = os.path.exists(UDP_TABLE)
+        if not self.kernel_counters:
+            print("Kernel drop counters are not available, only ring drops are counted")
+
+        self.received = 0
+        self.kernel_drops = 0
+        self.ring_drops = 0
+
+        self.file = open(folder.joinpath("overflow.csv"), "w")
+        self.file.write("time,received,kernel_drops,ring_drops,unintended_loss\n")
+
+    def unintended_loss(self) -> float:
+        lost = self.kernel_drops + self.ring_drops
+        return lost / max(self.received + self.kernel_drops, 1)
+
+    def poll(self, received: int, ring_drops: int = 0):
+        """
+        Takes the number of datagrams read from the socket and the number of
+        those dropped by the ingress ring.
+        """
+
+        if monotonic() - self.last_check < Check_Every:
+            return
+        self.check(received, ring_drops)
+
+    def check(self, received: int, ring_drops: int = 0):
+        self.last_check = monotonic()
+        self.received = received
+        self.ring_drops = ring_drops
+        if self.kernel_counters:
+            self.kernel_drops = read_kernel_drops(self.listen_address)
+
+        self.file.write(
+            f"{self.last_check - self.start_time},{self.received},{self.kernel_drops},{self.ring_drops},{self.unintended_loss()}\n"
+        )
+        self.file.flush()
+
+        if (
+            self.received + self.kernel_drops >= Min_Received
+            and self.unintended_loss() > self.max_unintended_loss
+        ):
+            raise RuntimeError(
+                f"The proxy lost {self.kernel_drops} datagrams in the kernel and {self.ring_drops} in the ingress ring, "
+                f"{self.unintended_loss():.2%} of the traffic is above the limit of {self.max_unintended_loss:.2%}"
+            )
+
+    def close(self):
+        self.file.close()
+        print(
+            f"Unintended loss: {self.kernel_drops} kernel drops, {self.ring_drops} ring drops, {self.unintended_loss():.4%} of {self.received} received datagrams"
+        )
@@ -0,0 +1,337 @@
+import time
+import select
+import socket
+import multiprocessing
+from pathlib import Path
+from random import Random
+from typing import List
+from multiprocessing.synchronize import Event
+from common import Packet, Address, Settings
+from proxy import Application, create_socket, receive
+from ring import SharedRing
+from corruption import BitErrorModel, CorruptionTarget
+from crc import CrcVerifier
+from adaptation import AdaptationBenchmark
+from control import ControlServer
+from events import EventLog
+from latency import LatencyErrorMonitor
+from overflow import OverflowMonitor, Max_Unintended_Loss
+from scenarios import create_settings, create_bit_error_model
+
+Ring_Capacity = 2**14
+Poll_Timeout = 0.01
+Parent_Check_Every = 1024
+# The egress stage sleeps this long once the ring was empty for Idle_Polls
+# polls in a row, so it does not hold a core while there is no traffic.
+Idle_Polls = 1024
+Idle_Sleep = 0.0005
+# Time the impairment stage gets to close its files before it is terminated.
+Stop_Timeout = 5.0
+
+
+def parent_alive() -> bool:
+    parent = multiprocessing.parent_process()
+    return parent is None or parent.is_alive()
+
+
+class ImpairmentApplication(Application):
+    """
+    Runs the impairment logic of the Application on packets handed over by the
+    ingress stage and hands the impaired packets to the egress stage until the
+    stop event is set.
+    """
+
+    def __init__(
+        self,
+        ingress: SharedRing,
+        egress: SharedRing,
+        stop: Event,
+        listen_address: Address,
+        addresses: List[Address],
+        rng: Random,
+        settings: Settings,
+        bit_errors: BitErrorModel | None = None,
+        crc: CrcVerifier | None = None,
+        adaptation: AdaptationBenchmark | None = None,
+        control: ControlServer | None = None,
+        events: EventLog | None = None,
+        latency_error: LatencyErrorMonitor | None = None,
+    ):
+        self.ingress = ingress
+        self.egress = egress
+        self.stop = stop
+        super().__init__(
+            listen_address,
+            addresses,
+            rng,
+            settings,
+            bit_errors,
+            crc,
+            adaptation,
+            control,
+            events,
+            latency_error=latency_error,
+        )
+
+    def open_socket(self):
+        # The ingress and egress stages own the socket.
+        pass
+
+    def run(self):
+        while parent_alive() and not self.stop.is_set():
+            for _ in range(Parent_Check_Every):
+                self.step()
+
+    def send(self, packet: Packet):
+        if not self.egress.push(packet.data, packet.send_address, time.monotonic()):
+            raise BlockingIOError
+
+    def receive_packets(self):
+        while True:
+            item = self.ingress.pop()
+            if item is None:
+                break
+
+            data, send_address, arrival_time = item
+            if not self.started:
+                self.settings.start(arrival_time)
+            self.started = True
+            self.unsorted_packet_recieve_list.append(
+                Packet(
+                    data,
+                    send_address,
+                    arrival_time=arrival_time,
+                    sequence=self.no_of_packets,
+                )
+            )
+            self.no_of_packets += 1
+
+
+def ingress_stage(sock: socket.socket, ring: SharedRing, addresses: List[Address]):
+    while parent_alive():
+        readable, _, _ = select.select([sock], [], [], Poll_Timeout)
+        if not readable:
+            continue
+
+        while True:
+            try:
+                data, address, arrival_time = receive(sock)
+            except BlockingIOError:
+                break
+
+            if address not in addresses:
+                addresses.append(address)
+
+            send_address = addresses[0] if address == addresses[1] else addresses[1]
+            # A full ring means the impairment stage fell behind, the packet is dropped.
+            ring.push(data, send_address, arrival_time)
+
+
+def impairment_stage(
+    ingress: SharedRing,
+    egress: SharedRing,
+    listen_address: Address,
+    addresses: List[Address],
+    seed: int,
+    scenario: str,
+    folder: Path,
+    bit_errors: CorruptionTarget | None,
+    verify_crc: bool,
+    benchmark_adaptation: bool,
+    control_address: Address | None,
+    event_log: bool,
+    ready: Event,
+    stop: Event,
+):
+    rng = Random(seed)
+    settings = create_settings(scenario, folder, rng, bit_errors is not None)
+    bit_error_model = (
+        None
+        if bit_errors is None
+        else create_bit_error_model(scenario, rng, bit_errors, addresses[0])
+    )
+    crc = CrcVerifier(folder, addresses[0], settings) if verify_crc else None
+    adaptation = (
+        AdaptationBenchmark(folder, addresses[0], settings)
+        if benchmark_adaptation
+        else None
+    )
+    control = (
+        None
+        if control_address is None
+        else ControlServer(control_address, folder, settings)
+    )
+    events = EventLog(folder, addresses[0], settings) if event_log else None
+    latency_error = LatencyErrorMonitor(folder, settings)
+    app = ImpairmentApplication(
+        ingress=ingress,
+        egress=egress,
+        stop=stop,
+        listen_address=listen_address,
+        addresses=addresses,
+        rng=rng,
+        settings=settings,
+        bit_errors=bit_error_model,
+        crc=crc,
+        adaptation=adaptation,
+        control=control,
+        events=events,
+        latency_error=latency_error,
+    )
+    ready.set()
+
+    try:
+        app.run()
+    finally:
+        settings.close()
+        if crc is not None:
+            crc.close()
+        if adaptation is not None:
+            adaptation.close()
+        if control is not None:
+            control.close()
+        if events is not None:
+            events.close()
+        latency_error.close()
+
+
+def egress_stage(sock: socket.socket, ring: SharedRing):
+    pending = None
+    empty_polls = 0
+    while parent_alive():
+        for _ in range(Parent_Check_Every):
+            if pending is None:
+                pending = ring.pop()
+                if pending is None:
+                    empty_polls += 1
+                    time.sleep(Idle_Sleep if empty_polls >= Idle_Polls else 0)
+                    continue
+                empty_polls = 0
+
+            data, send_address, _ = pending
+            try:
+                sock.sendto(data, send_address)
+            except BlockingIOError:
+                select.select([], [sock], [], Poll_Timeout)
+                break
+            pending = None
+
+
+def run_pipeline(
+    listen_address: Address,
+    addresses: List[Address],
+    seed: int,
+    scenario: str,
+    folder: Path,
+    update_every: float,
+    bit_errors: CorruptionTarget | None = None,
+    verify_crc: bool = False,
+    benchmark_adaptation: bool = False,
+    control_address: Address | None = None,
+    event_log: bool = False,
+    max_unintended_loss: float = Max_Unintended_Loss,
+):
+    """
+    Runs the proxy as three processes: ingress receives datagrams, impairment
+    applies the scenario and egress sends the datagrams. The stages are
+    connected by shared memory rings whose backlog is written to pipeline.csv.
+    Datagrams dropped by the kernel or the ingress ring are counted by an
+    OverflowMonitor.
+
+    Only the socket I/O is moved out of the impairment stage. Both directions
+    share one emulated link and the adaptation benchmark needs both of them, so
+    the impairment logic still runs in a single process and does not scale
+    beyond one core.
+
+    Raises a RuntimeError if a stage exits while the proxy is running.
+    """
+
+    sock = create_socket(listen_address)
+    ingress = SharedRing(Ring_Capacity)
+    egress = SharedRing(Ring_Capacity)
+    ready = multiprocessing.Event()
+    stop = multiprocessing.Event()
+
+    stages = [
+        multiprocessing.Process(
+            name="impairment",
+            target=impairment_stage,
+            args=(
+                ingress,
+                egress,
+                listen_address,
+                addresses,
+                seed,
+                scenario,
+                folder,
+                bit_errors,
+                verify_crc,
+                benchmark_adaptation,
+                control_address,
+                event_log,
+                ready,
+                stop,
+            ),
+            # Not daemonic so the CrcVerifier can start its process, the stage
+            # still exits on its own once the parent is gone.
+            daemon=False,
+        ),
+        multiprocessing.Process(
+            name="ingress",
+            target=ingress_stage,
+            args=(sock, ingress, addresses),
+            daemon=True,
+        ),
+        multiprocessing.Process(
+            name="egress", target=egress_stage, args=(sock, egress), daemon=True
+        ),
+    ]
+    impairment = stages[0]
+    overflow = None
+
+    try:
+        impairment.start()
+        while not ready.wait(Poll_Timeout):
+            if not impairment.is_alive():
+                raise RuntimeError(
+                    f"The impairment stage exited with code {impairment.exitcode} before it was ready"
+                )
+
+        for stage in stages[1:]:
+            stage.start()
+
+        overflow = OverflowMonitor(folder, listen_address, max_unintended_loss)
+
+        start_time = time.monotonic()
+        with open(folder.joinpath("pipeline.csv"), "w") as file:
+            file.write(
+                "time,ingress_backlog,egress_backlog,ingress_dropped,egress_full\n"
+            )
+            while all(stage.is_alive() for stage in stages):
+                time.sleep(update_every)
+                file.write(
+                    f"{time.monotonic() - start_time},{ingress.backlog()},{egress.backlog()},{ingress.full()},{egress.full()}\n"
+                )
+                file.flush()
+                overflow.check(ingress.pushed() + ingress.full(), ingress.full())
+
+        for stage in stages:
+            if not stage.is_alive():
+                raise RuntimeError(
+                    f"The {stage.name} stage exited with code {stage.exitcode}"
+                )
+    finally:
+        stop.set()
+        if impairment.pid is not None:
+            impairment.join(Stop_Timeout)
+        for stage in stages:
+            if stage.pid is not None:
+                stage.terminate()
+                stage.join()
+
+        if overflow is not None:
+            overflow.close()
+        sock.close()
+        for ring in (ingress, egress):
+            ring.close()
+            ring.unlink()
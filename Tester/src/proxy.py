@@ -0,0 +1,279 @@
+import sys
+import math
+import time
+import socket
+import struct
+from collections import deque
+from random import Random
+from typing import Deque, List, Tuple
+from common import Settings, Packet, Address
+from corruption import BitErrorModel
+from crc import CrcVerifier
+from adaptation import AdaptationBenchmark
+from control import ControlServer
+from events import EventLog, FORWARDED, LOST, QUEUE_DROPPED, MTU_DROPPED
+from overflow import OverflowMonitor, size_buffers
+from latency import LatencyErrorMonitor
+
+# Python does not export the Linux option, SCM_TIMESTAMPNS has the same value.
+SO_TIMESTAMPNS = 35
+TIMESPEC = struct.Struct("@ll")
+Kernel_Timestamps = sys.platform == "linux"
+
+
+def create_socket(listen_address: Address) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    size_buffers(sock)
+    if Kernel_Timestamps:
+        sock.setsockopt(socket.SOL_SOCKET, SO_TIMESTAMPNS, 1)
+    sock.bind(listen_address)
+    sock.setblocking(False)
+    return sock
+
+
+def receive(sock: socket.socket) -> Tuple[bytes, Address, float]:
+    """
+    Receives a datagram with its arrival time on the monotonic clock. On Linux
+    the arrival time comes from the kernel timestamp, so it does not include
+    the time the datagram waited for the proxy.
+    """
+
+    if not Kernel_Timestamps:
+        data, address = sock.recvfrom(4096)
+        return data, address, time.monotonic()
+
+    data, ancillary, _, address = sock.recvmsg(4096, socket.CMSG_SPACE(TIMESPEC.size))
+    now = time.monotonic()
+    for level, kind, value in ancillary:
+        if level == socket.SOL_SOCKET and kind == SO_TIMESTAMPNS:
+            # The timestamp is on the wall clock, only its age is used.
+            seconds, nanoseconds = TIMESPEC.unpack_from(value)
+            age = time.time_ns() - seconds * 10**9 - nanoseconds
+            return data, address, now - max(age, 0) / 10**9
+    return data, address, now
+
+
+class Application:
+    def __init__(
+        self,
+        listen_address: Address,
+        addresses: List[Address],
+        rng: Random,
+        settings: Settings,
+        bit_errors: BitErrorModel | None = None,
+        crc: CrcVerifier | None = None,
+        adaptation: AdaptationBenchmark | None = None,
+        control: ControlServer | None = None,
+        events: EventLog | None = None,
+        overflow: OverflowMonitor | None = None,
+        latency_error: LatencyErrorMonitor | None = None,
+    ):
+        self.listen_address = listen_address
+        self.addresses = addresses
+        self.rng = rng
+        self.settings = settings
+        self.bit_errors = bit_errors
+        self.crc = crc
+        self.adaptation = adaptation
+        self.control = control
+        self.events = events
+        self.overflow = overflow
+        self.latency_error = latency_error
+
+        self.open_socket()
+
+        self.unsorted_packet_recieve_list: List[Packet] = []
+        self.unsorted_packet_send_list: List[Packet] = []
+
+        self.latency_queue: Deque[Packet] = deque()
+        self.packet_to_be_sent: Packet | None = None
+        self.link_free_time = 0.0
+
+        self.started = False
+        self.no_of_packets = 0
+
+    def open_socket(self):
+        self.socket = create_socket(self.listen_address)
+
+    def run(self):
+        while True:
+            self.step()
+
+    def step(self):
+        if self.control is not None:
+            self.control.poll()
+        if self.overflow is not None:
+            self.overflow.poll(self.no_of_packets)
+        if self.latency_error is not None:
+            self.latency_error.poll()
+        self.send_packets()
+        self.settings.update(self.started)
+        self.receive_packets()
+        self.settings.update(self.started)
+        self.add_to_latency_queue()
+        self.settings.update(self.started)
+        self.promote_packet_to_be_sent()
+        self.settings.update(self.started)
+
+    def corrupt_data(self, packet: Packet):
+        i = self.rng.randint(0, len(packet.data) - 1)
+        b = packet.data[i] ^ (1 << self.rng.randint(0, 7))
+        packet.data = packet.data[:i] + bytes([b]) + packet.data[i + 1 :]
+
+    def send_packets(self):
+        while len(self.unsorted_packet_send_list) > 0:
+            try:
+                packet = self.unsorted_packet_send_list[-1]
+                corruption_rate = self.settings.packet_corruption_rate
+                if self.bit_errors is None and self.rng.random() < corruption_rate:
+                    original = packet.data
+                    no_of_corruptions = self.settings.no_of_packet_corruptions.get_int()
+                    for _ in range(no_of_corruptions):
+                        self.corrupt_data(packet)
+                    # Two flips of the same bit leave the packet unchanged.
+                    packet.corrupted = packet.corrupted or packet.data != original
+
+                self.send(packet)
+                self.unsorted_packet_send_list.pop()
+                if self.crc is not None:
+                    self.crc.add(packet)
+                if self.adaptation is not None:
+                    self.adaptation.forwarded(packet)
+                if self.latency_error is not None:
+                    self.latency_error.released(packet)
+                if self.events is not None:
+                    self.events.log(packet, FORWARDED, time.monotonic())
+            except BlockingIOError:
+                break
+
+    def send(self, packet: Packet):
+        self.socket.sendto(packet.data, packet.send_address)
+
+    def receive_packets(self):
+        while True:
+            try:
+                data, address, arrival_time = receive(self.socket)
+                if not self.started:
+                    self.settings.start(arrival_time)
+                self.started = True
+
+                if address not in self.addresses:
+                    self.addresses.append(address)
+
+                send_address = (
+                    self.addresses[0]
+                    if address == self.addresses[1]
+                    else self.addresses[1]
+                )
+                self.unsorted_packet_recieve_list.append(
+                    Packet(
+                        data,
+                        send_address,
+                        arrival_time=arrival_time,
+                        sequence=self.no_of_packets,
+                    )
+                )
+                self.no_of_packets += 1
+            except BlockingIOError:
+                break
+
+    def add_to_latency_queue(self):
+        if self.bit_errors is not None:
+            self.bit_errors.corrupt(
+                self.unsorted_packet_recieve_list, self.settings.bit_error_rate
+            )
+
+        while len(self.unsorted_packet_recieve_list) > 0:
+            length_of_packet_list = len(self.unsorted_packet_recieve_list)
+            choice = self.rng.randint(0, length_of_packet_list - 1)
+            if choice == length_of_packet_list - 1:
+                packet = self.unsorted_packet_recieve_list.pop()
+            else:
+                packet = self.unsorted_packet_recieve_list[choice]
+                self.unsorted_packet_recieve_list[choice] = (
+                    self.unsorted_packet_recieve_list[-1]
+                )
+                self.unsorted_packet_recieve_list.pop()
+
+            if self.adaptation is not None:
+                self.adaptation.arrived(packet)
+
+            no_of_fragments = self.no_of_fragments(packet)
+            rand = self.rng.random()
+
+            if no_of_fragments > 1 and not self.settings.fragment:
+                if self.events is not None:
+                    self.events.log(packet, MTU_DROPPED)
+                continue
+            if rand < self.loss_rate(packet, no_of_fragments):
+                if self.events is not None:
+                    self.events.log(packet, LOST)
+                continue
+            if len(self.latency_queue) >= self.settings.queue_limit:
+                if self.events is not None:
+                    self.events.log(packet, QUEUE_DROPPED)
+                continue
+            # The latency starts when the datagram arrived, not when the loop
+            # got to it.
+            arrival_time = packet.arrival_time or time.monotonic()
+            packet.time = arrival_time + self.settings.latency
+            if self.latency_error is not None:
+                self.latency_error.scheduled(packet)
+
+            self.latency_queue.appendleft(packet)
+
+    def no_of_fragments(self, packet: Packet) -> int:
+        if len(packet.data) <= self.settings.mtu:
+            return 1
+        return math.ceil(len(packet.data) / max(self.settings.mtu, 1))
+
+    def loss_rate(self, packet: Packet, no_of_fragments: int) -> float:
+        # Every fragment is lost independently and losing one loses the packet.
+        if self.settings.loss_reference_size > 0:
+            size = len(packet.data) + no_of_fragments * self.settings.packet_overhead
+            exponent = size / self.settings.loss_reference_size
+        else:
+            exponent = no_of_fragments
+
+        if exponent == 1:
+            return self.settings.packet_loss_rate
+        return 1 - (1 - min(self.settings.packet_loss_rate, 1)) ** exponent
+
+    def transmission_time(self, packet: Packet) -> float:
+        no_of_fragments = self.no_of_fragments(packet)
+        size = len(packet.data) + no_of_fragments * self.settings.packet_overhead
+        return max(
+            size / self.settings.bandwidth,
+            no_of_fragments / self.settings.max_packet_rate,
+        )
+
+    def promote_packet_to_be_sent(self):
+        # Check if the packet_to_be_sent is set. If not set it.
+        if self.packet_to_be_sent is not None:
+            # Check if the packet_to_be_sent can be sent.
+            if (
+                self.packet_to_be_sent.time is not None
+                and time.monotonic() >= self.packet_to_be_sent.time
+            ):
+                # Send packet
+                self.unsorted_packet_send_list.append(self.packet_to_be_sent)
+                self.packet_to_be_sent = None
+            else:
+                return
+
+        if len(self.latency_queue) == 0:
+            return
+
+        if (
+            self.latency_queue[-1].time is not None
+            and time.monotonic() >= self.latency_queue[-1].time
+        ):
+            packet = self.latency_queue.pop()
+            assert packet.time is not None
+            # The transmission starts when the packet is due and the previous
+            # one was sent, not when the loop got to it.
+            start = max(packet.time, self.link_free_time)
+            packet.time = self.transmission_time(packet) + start
+            self.link_free_time = packet.time
+
+            self.packet_to_be_sent = packet
@@ -1,9 +1,12 @@
 @echo off
-REM Usage: receiver.bat [udp|rtp|srt|rist] output.mp4
+REM Usage: receiver.bat [udp|rtp|srt|rist] output.mp4 [port] [stream.sdp]
 
 set PROTO=%1
 set OUTPUT=%2
 set PORT=2004
+set SDP=stream.sdp
+if not "%3"=="" set PORT=%3
+if not "%4"=="" set SDP=%4
 
 if "%PROTO%"=="" (
     echo Usage: %~nx0 [udp^|rtp^|srt^|rist] output.mp4
@@ -26,7 +29,7 @@ if /i "%PROTO%"=="udp" (
     ffmpeg -y -i "udp://127.0.0.1:%PORT%" -t %DURATION% -vf %DRAW% -c:v h264_nvenc -preset fast -cq 23 -c:a copy "%OUTPUT%"
     exit /b
 ) else if /i "%PROTO%"=="rtp" (
-    ffmpeg -y -protocol_whitelist file,udp,rtp -i stream.sdp -t %DURATION% -vf %DRAW% -c:v h264_nvenc -preset fast -cq 23 -c:a copy "%OUTPUT%"
+    ffmpeg -y -protocol_whitelist file,udp,rtp -i %SDP% -t %DURATION% -vf %DRAW% -c:v h264_nvenc -preset fast -cq 23 -c:a copy "%OUTPUT%"
     exit /b
 ) else if /i "%PROTO%"=="srt" (
     ffmpeg -y -i "srt://127.0.0.1:%PORT%?mode=listener" -t %DURATION% -vf %DRAW% -c:v h264_nvenc -preset fast -cq 23 -c:a copy "%OUTPUT%"
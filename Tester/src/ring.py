@@ -0,0 +1,106 @@
+import socket
+import struct
+from multiprocessing import shared_memory
+from typing import Tuple
+from common import Address
+
+# Indexes of the 8 byte head, tail and full counters. Each one sits on its own
+# cache line so the producer and the consumer never write to the same line.
+HEAD = 0
+TAIL = 8
+FULL = 16
+HEADER_SIZE = 192
+
+MAX_PACKET_SIZE = 4096
+
+# time, ip, port, length
+SLOT_HEADER = struct.Struct("<d4sHH")
+SLOT_SIZE = SLOT_HEADER.size + MAX_PACKET_SIZE
+
+
+class SharedRing:
+    """
+    Lock-free single producer, single consumer ring of datagrams in shared memory.
+
+    Only the producer writes the head and the full counters and only the
+    consumer writes the tail, so aligned 8 byte stores are enough to hand a slot
+    over. The packet is copied into the slot once and the processes only
+    exchange the slot index through the counters.
+    """
+
+    def __init__(self, capacity: int, name: str | None = None):
+        if capacity <= 0 or capacity & (capacity - 1) != 0:
+            raise ValueError("The ring capacity must be a power of two")
+
+        self.capacity = capacity
+        self.mask = capacity - 1
+
+        if name is None:
+            self.memory = shared_memory.SharedMemory(
+                create=True, size=HEADER_SIZE + capacity * SLOT_SIZE
+            )
+            self.memory.buf[:HEADER_SIZE] = bytes(HEADER_SIZE)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name, track=False)
+
+        self.buffer = self.memory.buf
+        self.counters = self.buffer[:HEADER_SIZE].cast("Q")
+
+    def __getstate__(self):
+        return (self.capacity, self.memory.name)
+
+    def __setstate__(self, state):
+        capacity, name = state
+        self.__init__(capacity, name)
+
+    def push(self, data: bytes, address: Address, time: float) -> bool:
+        head = self.counters[HEAD]
+        if head - self.counters[TAIL] >= self.capacity:
+            self.counters[FULL] += 1
+            return False
+
+        offset = HEADER_SIZE + (head & self.mask) * SLOT_SIZE
+        length = len(data)
+        SLOT_HEADER.pack_into(
+            self.buffer,
+            offset,
+            time,
+            socket.inet_aton(address[0]),
+            address[1],
+            length,
+        )
+        start = offset + SLOT_HEADER.size
+        self.buffer[start : start + length] = data
+
+        self.counters[HEAD] = head + 1
+        return True
+
+    def pop(self) -> Tuple[bytes, Address, float] | None:
+        tail = self.counters[TAIL]
+        if tail == self.counters[HEAD]:
+            return None
+
+        offset = HEADER_SIZE + (tail & self.mask) * SLOT_SIZE
+        time, ip, port, length = SLOT_HEADER.unpack_from(self.buffer, offset)
+        start = offset + SLOT_HEADER.size
+        data = bytes(self.buffer[start : start + length])
+
+        self.counters[TAIL] = tail + 1
+        return data, (socket.inet_ntoa(ip), port), time
+
+    def backlog(self) -> int:
+        return self.counters[HEAD] - self.counters[TAIL]
+
+    def pushed(self) -> int:
+        return self.counters[HEAD]
+
+    def full(self) -> int:
+        return self.counters[FULL]
+
+    def close(self):
+        self.counters.release()
+        self.buffer = None
+        self.memory.close()
+
+    def unlink(self):
+        self.memory.unlink()
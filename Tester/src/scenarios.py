@@ -0,0 +1,260 @@
+"""
+Best
+    Bandwidth: 15MB/s +- 2MB/s
+    Latency: 10ms +- 5ms
+    Packet Loss Rate: 0%
+    Packet Corruption Rate: 0%
+    No of Packet Corruptions: 0
+    Bit Error Rate: 0
+
+Average
+    Bandwidth: 10MB/s +- 2MB/s with spikes up to 5MB/s
+    Latency: 60ms +- 10ms with spikes up to 90ms
+    Packet Loss Rate: 2.5% +- 2.5% with spikes up to 7.5%
+    Packet Corruption Rate: 1% +- 1% with spikes up to 3%
+    No of Packet Corruptions: ExpoVariate(2)
+    Bit Error Rate: 1.5e-6 +- 1.5e-6 with spikes up to 4.5e-6, bursts of up to 32 packets at 10x
+
+Worst
+    Bandwidth: 5MB/s +- 2MB/s
+    Latency: 100ms +- 20ms
+    Packet Loss Rate: 10%
+    Packet Corruption Rate: 5%
+    No of Packet Corruptions: ExpoVariate(2)
+    Bit Error Rate: 8e-6, bursts of up to 64 packets at 10x
+
+Adaptation
+    Bandwidth: Steps of 10s through 15MB/s, 2MB/s, 15MB/s, 5MB/s, 10MB/s, 1MB/s
+    Latency: 10ms
+    Packet Loss Rate: 0%
+    Packet Corruption Rate: 0%
+    No of Packet Corruptions: 0
+    Bit Error Rate: 0
+
+Radio
+    Bandwidth: 8MB/s +- 2MB/s
+    Latency: 30ms +- 10ms
+    Packet Loss Rate: 2% +- 2% for 1064 byte packets, less for smaller ones
+    Packet Corruption Rate: 0%
+    No of Packet Corruptions: 0
+    Bit Error Rate: 0
+    Packet Overhead: 128 bytes
+    Max Packet Rate: 6000/s
+    MTU: 1500 bytes, larger packets are fragmented
+
+The bit error rates roughly match the packet corruption of each scenario for
+1064 byte packets and are only used when the proxy runs with --bit-errors.
+"""
+
+from random import Random
+from pathlib import Path
+from common import (
+    ConstantProvider,
+    RandomExpovariate,
+    RandomGauss,
+    RandomGaussWithSpikes,
+    Settings,
+    StepProvider,
+    Address,
+)
+from corruption import BitErrorModel, CorruptionTarget
+
+Spike_Chance = 0.005
+Spike_Duration = 30
+Update_Every = 0.5
+Step_Duration = 20
+
+
+def create_settings(
+    scenario: str, folder: Path, rng: Random, bit_errors: bool = False
+) -> Settings:
+    if scenario == "Best":
+        settings = Settings(
+            folder=folder,
+            update_every=Update_Every,
+            bandwidth=RandomGauss(
+                seed=rng.randint(0, 10**5),
+                mean=15 * 1024 * 1024,
+                stddev=1 * 1024 * 1024,
+            ),
+            latency=RandomGauss(
+                seed=rng.randint(0, 10**5),
+                mean=10 / 1000,
+                stddev=2.5 / 1000,
+            ),
+            packet_loss_rate=ConstantProvider(0),
+            packet_corruption_rate=ConstantProvider(0),
+            no_of_packet_corruptions=ConstantProvider(0),
+            bit_error_rate=ConstantProvider(0) if bit_errors else None,
+        )
+    elif scenario == "Average":
+        settings = Settings(
+            folder=folder,
+            update_every=Update_Every,
+            bandwidth=RandomGaussWithSpikes(
+                seed=rng.randint(0, 10**5),
+                mean=10 * 1024 * 1024,
+                stddev=1 * 1024 * 1024,
+                spike_multiplier=0.5,
+                spike_chance=Spike_Chance,
+                max_spike_duration=Spike_Duration,
+            ),
+            latency=RandomGaussWithSpikes(
+                seed=rng.randint(0, 10**5),
+                mean=60 / 1000,
+                stddev=5 / 1000,
+                spike_multiplier=1.5,
+                spike_chance=Spike_Chance,
+                max_spike_duration=Spike_Duration,
+            ),
+            packet_loss_rate=RandomGaussWithSpikes(
+                seed=rng.randint(0, 10**5),
+                mean=2.5 / 100,
+                stddev=1.25 / 100,
+                spike_multiplier=3,
+                spike_chance=Spike_Chance,
+                max_spike_duration=Spike_Duration,
+            ),
+            packet_corruption_rate=RandomGaussWithSpikes(
+                seed=rng.randint(0, 10**5),
+                mean=1 / 100,
+                stddev=0.5 / 100,
+                spike_multiplier=3,
+                spike_chance=Spike_Chance,
+                max_spike_duration=Spike_Duration,
+            ),
+            no_of_packet_corruptions=RandomExpovariate(
+                seed=rng.randint(0, 10**5),
+                lam=2.5,
+                start_value=1,
+            ),
+            bit_error_rate=(
+                RandomGaussWithSpikes(
+                    seed=rng.randint(0, 10**5),
+                    mean=1.5 / 10**6,
+                    stddev=0.75 / 10**6,
+                    spike_multiplier=3,
+                    spike_chance=Spike_Chance,
+                    max_spike_duration=Spike_Duration,
+                )
+                if bit_errors
+                else None
+            ),
+        )
+    elif scenario == "Worst":
+        settings = Settings(
+            folder=folder,
+            update_every=Update_Every,
+            bandwidth=RandomGauss(
+                seed=rng.randint(0, 10**5),
+                mean=5 * 1024 * 1024,
+                stddev=1 * 1024 * 1024,
+            ),
+            latency=RandomGauss(
+                seed=rng.randint(0, 10**5),
+                mean=100 / 1000,
+                stddev=10 / 1000,
+            ),
+            packet_loss_rate=ConstantProvider(10 / 100),
+            packet_corruption_rate=ConstantProvider(5 / 100),
+            no_of_packet_corruptions=RandomExpovariate(
+                seed=rng.randint(0, 10**5),
+                lam=2.5,
+                start_value=1,
+            ),
+            bit_error_rate=ConstantProvider(8 / 10**6) if bit_errors else None,
+        )
+    elif scenario == "Adaptation":
+        settings = Settings(
+            folder=folder,
+            update_every=Update_Every,
+            bandwidth=StepProvider(
+                [
+                    (Step_Duration, 15 * 1024 * 1024),
+                    (Step_Duration, 2 * 1024 * 1024),
+                    (Step_Duration, 15 * 1024 * 1024),
+                    (Step_Duration, 5 * 1024 * 1024),
+                    (Step_Duration, 10 * 1024 * 1024),
+                    (Step_Duration, 1 * 1024 * 1024),
+                ]
+            ),
+            latency=ConstantProvider(10 / 1000),
+            packet_loss_rate=ConstantProvider(0),
+            packet_corruption_rate=ConstantProvider(0),
+            no_of_packet_corruptions=ConstantProvider(0),
+            bit_error_rate=ConstantProvider(0) if bit_errors else None,
+        )
+    elif scenario == "Radio":
+        settings = Settings(
+            folder=folder,
+            update_every=Update_Every,
+            bandwidth=RandomGauss(
+                seed=rng.randint(0, 10**5),
+                mean=8 * 1024 * 1024,
+                stddev=1 * 1024 * 1024,
+            ),
+            latency=RandomGauss(
+                seed=rng.randint(0, 10**5),
+                mean=30 / 1000,
+                stddev=5 / 1000,
+            ),
+            packet_loss_rate=RandomGauss(
+                seed=rng.randint(0, 10**5),
+                mean=2 / 100,
+                stddev=1 / 100,
+            ),
+            packet_corruption_rate=ConstantProvider(0),
+            no_of_packet_corruptions=ConstantProvider(0),
+            bit_error_rate=ConstantProvider(0) if bit_errors else None,
+            packet_overhead=ConstantProvider(128),
+            max_packet_rate=ConstantProvider(6000),
+            mtu=ConstantProvider(1500),
+            fragment=ConstantProvider(1),
+            loss_reference_size=ConstantProvider(1064 + 128),
+        )
+    elif scenario == "Testing":
+        settings = Settings(
+            folder=folder,
+            update_every=Update_Every,
+            bandwidth=ConstantProvider(10**5),
+            latency=ConstantProvider(1000 / 1000),
+            packet_loss_rate=ConstantProvider(0),
+            packet_corruption_rate=ConstantProvider(0),
+            no_of_packet_corruptions=ConstantProvider(0),
+            bit_error_rate=ConstantProvider(0) if bit_errors else None,
+        )
+    else:
+        raise ValueError("Invalid Scenario")
+
+    return settings
+
+
+def create_bit_error_model(
+    scenario: str, rng: Random, target: CorruptionTarget, receiver_address: Address
+) -> BitErrorModel:
+    if scenario == "Average":
+        return BitErrorModel(
+            seed=rng.randint(0, 10**5),
+            receiver_address=receiver_address,
+            target=target,
+            burst_chance=Spike_Chance,
+            max_burst_length=32,
+            burst_multiplier=10,
+        )
+    elif scenario == "Worst":
+        return BitErrorModel(
+            seed=rng.randint(0, 10**5),
+            receiver_address=receiver_address,
+            target=target,
+            burst_chance=Spike_Chance,
+            max_burst_length=64,
+            burst_multiplier=10,
+        )
+    elif scenario in ("Best", "Adaptation", "Radio", "Testing"):
+        return BitErrorModel(
+            seed=rng.randint(0, 10**5),
+            receiver_address=receiver_address,
+            target=target,
+        )
+    else:
+        raise ValueError("Invalid Scenario")
@@ -1,9 +1,10 @@
 @echo off
-REM Usage: sender.bat [udp|rtp|srt]
+REM Usage: sender.bat [udp|rtp|srt] [port]
 
 set PROTO=%1
 set TARGET_IP=127.0.0.1
 set PORT=2003
+if not "%2"=="" set PORT=%2
 
 if "%PROTO%"=="" (
     echo Usage: %~nx0 [udp^|rtp^|srt^|rist]
@@ -0,0 +1,28 @@
+import struct
+
+# Layout of the packets in src/common/udp.zig. Zig orders the fields of a
+# struct by alignment, so the wire layout differs from the declaration order.
+
+# UdpSenderPacket.Header: id, generated_timestamp, frame_number, crc, size,
+# resolution, no_of_splits, parent_offset, is_key_frame, frame_rate and 4 bytes
+# of padding.
+SENDER_HEADER_SIZE = 40
+SENDER_CRC_OFFSET = 24
+SENDER_SIZE_OFFSET = 28
+SENDER_RESOLUTION_OFFSET = 30
+SENDER_FRAME_RATE_OFFSET = 35
+
+# UdpReceiverPacket.Header: crc, new_resolution, no_of_nacks, new_frame_rate,
+# stop and 3 bytes of padding.
+RECEIVER_HEADER_SIZE = 12
+RECEIVER_CRC_OFFSET = 0
+RECEIVER_RESOLUTION_OFFSET = 4
+RECEIVER_NO_OF_NACKS_OFFSET = 6
+RECEIVER_FRAME_RATE_OFFSET = 7
+NACK_SIZE = 8
+
+CRC = struct.Struct("<I")
+U16 = struct.Struct("<H")
+
+RESOLUTIONS = (360, 480, 720, 1080)
+FRAME_RATES = (30, 60)
@@ -0,0 +1,301 @@
+import cv2
+import time
+import subprocess
+import psutil
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Tuple
+from get_data_from_video import get_latency, get_frame_number
+
+PROTOCOLS = ["rtp", "srt", "rist", "udp"]
+SCENARIOS = ["Best", "Average", "Worst"]
+
+Concurrency = 4
+Min_Seeds = 8
+Max_Seeds = 64
+# Stop once the 95% confidence interval of every metric is within this
+# fraction of its mean, or within its absolute precision for metrics that are
+# close to 0.
+Relative_Precision = 0.05
+Bootstrap_Resamples = 10_000
+Permutation_Resamples = 10_000
+Sample_Every = 30
+Base_Port = 3000
+Startup_Time = 5
+# Every sweep gets its own folder, the proxy refuses to reuse a run folder.
+Sweep_Folder = Path(f"./Runs/Sweep-{time.time_ns()}")
+
+# The latencies are end to end in ms, repeated_frames is the fraction of
+# sampled frames the receiver showed twice and skipped_frames the number of
+# sender frames missing after a sampled frame.
+METRICS = [
+    "latency_p50",
+    "latency_p95",
+    "latency_p99",
+    "repeated_frames",
+    "skipped_frames",
+]
+Absolute_Precision = {
+    "latency_p50": 2.0,
+    "latency_p95": 2.0,
+    "latency_p99": 2.0,
+    "repeated_frames": 0.002,
+    "skipped_frames": 0.01,
+}
+
+Samples = Dict[Tuple[str, str], List[Dict[str, float]]]
+
+
+def bootstrap_ci(
+    samples: np.ndarray, rng: np.random.Generator, confidence: float = 0.95
+) -> Tuple[float, float, float]:
+    """Returns the mean and the percentile bootstrap confidence interval."""
+
+    indexes = rng.integers(0, len(samples), (Bootstrap_Resamples, len(samples)))
+    means = samples[indexes].mean(axis=1)
+    low, high = np.quantile(means, [(1 - confidence) / 2, (1 + confidence) / 2])
+    return float(samples.mean()), float(low), float(high)
+
+
+def permutation_test(a: np.ndarray, b: np.ndarray, rng: np.random.Generator) -> float:
+    """Returns the two sided p value of the difference of the means."""
+
+    pooled = np.tile(np.concatenate((a, b)), (Permutation_Resamples, 1))
+    pooled = rng.permuted(pooled, axis=1)
+    differences = pooled[:, : len(a)].mean(axis=1) - pooled[:, len(a) :].mean(axis=1)
+    observed = abs(a.mean() - b.mean())
+    return float(
+        (np.count_nonzero(np.abs(differences) >= observed) + 1)
+        / (Permutation_Resamples + 1)
+    )
+
+
+def kill_tree(process: subprocess.Popen):
+    try:
+        parent = psutil.Process(process.pid)
+        processes = parent.children(recursive=True) + [parent]
+    except psutil.NoSuchProcess:
+        return
+
+    for proc in processes:
+        try:
+            proc.kill()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+    psutil.wait_procs(processes, timeout=3)
+
+
+def collect_metrics(folder: Path) -> Dict[str, float] | None:
+    """
+    Measures the stream the receiver saved. Every Sample_Every frames a pair of
+    consecutive frames is read: the end to end latency comes from the sender
+    and receiver clocks drawn on the first frame, and the sender frame numbers
+    of the pair show whether the receiver repeated a frame or sender frames
+    never arrived. Returns None if no frame could be read.
+    """
+
+    video = cv2.VideoCapture(str(folder / "out.mp4"))
+    latencies: List[float] = []
+    pairs = repeated = skipped = 0
+    first_number = None
+    frame_count = -1
+
+    while video.grab():
+        frame_count += 1
+        position = frame_count % Sample_Every
+        if position > 1:
+            continue
+
+        ret, frame = video.retrieve()
+        if not ret:
+            continue
+
+        frame_number = get_frame_number(frame)
+        if position == 0:
+            first_number = frame_number
+            latency = get_latency(frame)
+            if latency is not None:
+                latencies.append(latency)
+        elif (
+            first_number is not None
+            and frame_number is not None
+            and frame_number >= first_number
+        ):
+            pairs += 1
+            if frame_number == first_number:
+                repeated += 1
+            else:
+                skipped += frame_number - first_number - 1
+
+    video.release()
+    if len(latencies) == 0 or pairs == 0:
+        return None
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "latency_p50": float(p50),
+        "latency_p95": float(p95),
+        "latency_p99": float(p99),
+        "repeated_frames": repeated / pairs,
+        "skipped_frames": skipped / pairs,
+    }
+
+
+def start_run(protocol: str, scenario: str, seed: int, slot: int):
+    listen_port = Base_Port + slot * 10
+    receiver_port = listen_port + 1
+    project = f"{Sweep_Folder.name}\\{protocol}\\{seed}"
+    folder = Sweep_Folder / protocol / str(seed) / scenario
+
+    proxy = subprocess.Popen(
+        [
+            "uv",
+            "run",
+            ".\\src\\main.py",
+            "--project",
+            project,
+            "--scenario",
+            scenario,
+            "--seed",
+            str(seed),
+            "--listen-port",
+            str(listen_port),
+            "--receiver-port",
+            str(receiver_port),
+        ],
+        stdout=subprocess.DEVNULL,
+    )
+    time.sleep(Startup_Time)
+
+    if proxy.poll() is not None or not folder.exists():
+        print(
+            f"The proxy of {folder} exited with code {proxy.poll()}, skipping the run"
+        )
+        kill_tree(proxy)
+        return None
+
+    sdp = folder / "stream.sdp"
+    sdp.write_text(
+        Path("stream.sdp")
+        .read_text()
+        .replace("m=video 2004", f"m=video {receiver_port}")
+    )
+    receiver = subprocess.Popen(
+        [
+            "src\\receiver.bat",
+            protocol,
+            str(folder / "out.mp4"),
+            str(receiver_port),
+            str(sdp),
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    time.sleep(Startup_Time)
+    sender = subprocess.Popen(
+        ["src\\sender.bat", protocol, str(listen_port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return folder, proxy, receiver, sender
+
+
+def run_wave(protocol: str, scenario: str, seeds: List[int]) -> List[Dict[str, float]]:
+    runs = [
+        run
+        for slot, seed in enumerate(seeds)
+        if (run := start_run(protocol, scenario, seed, slot)) is not None
+    ]
+
+    results = []
+    for folder, proxy, receiver, sender in runs:
+        # Without the proxy the receiver gets no stream and would never exit.
+        while receiver.poll() is None and proxy.poll() is None:
+            time.sleep(1)
+        code = receiver.poll()
+        kill_tree(sender)
+        kill_tree(receiver)
+        kill_tree(proxy)
+
+        if code is None:
+            print(f"The proxy of {folder} exited during the run, skipping the run")
+            continue
+        if code != 0:
+            print(f"Receiver of {folder} exited with code {code}, skipping the run")
+            continue
+
+        metrics = collect_metrics(folder)
+        if metrics is None:
+            print(f"No frames of {folder} could be read, skipping the run")
+            continue
+        results.append(metrics)
+    return results
+
+
+def is_converged(results: List[Dict[str, float]], rng: np.random.Generator) -> bool:
+    if len(results) < Min_Seeds:
+        return False
+    if len(results) >= Max_Seeds:
+        return True
+
+    for metric in METRICS:
+        samples = np.array([result[metric] for result in results])
+        mean, low, high = bootstrap_ci(samples, rng)
+        precision = max(Relative_Precision * abs(mean), Absolute_Precision[metric])
+        if (high - low) / 2 > precision:
+            return False
+    return True
+
+
+def write_summary(samples: Samples, rng: np.random.Generator):
+    with open(Sweep_Folder / "summary.csv", "w") as f:
+        f.write("protocol,scenario,metric,seeds,mean,low,high\n")
+        for (protocol, scenario), results in samples.items():
+            for metric in METRICS:
+                values = np.array([result[metric] for result in results])
+                if len(values) == 0:
+                    continue
+                mean, low, high = bootstrap_ci(values, rng)
+                f.write(
+                    f"{protocol},{scenario},{metric},{len(values)},{mean},{low},{high}\n"
+                )
+
+    with open(Sweep_Folder / "significance.csv", "w") as f:
+        f.write("scenario,metric,protocol_a,protocol_b,difference,p_value\n")
+        for scenario in SCENARIOS:
+            for i, protocol_a in enumerate(PROTOCOLS):
+                for protocol_b in PROTOCOLS[i + 1 :]:
+                    results_a = samples[(protocol_a, scenario)]
+                    results_b = samples[(protocol_b, scenario)]
+                    if len(results_a) == 0 or len(results_b) == 0:
+                        continue
+
+                    for metric in METRICS:
+                        a = np.array([result[metric] for result in results_a])
+                        b = np.array([result[metric] for result in results_b])
+                        p_value = permutation_test(a, b, rng)
+                        f.write(
+                            f"{scenario},{metric},{protocol_a},{protocol_b},{a.mean() - b.mean()},{p_value}\n"
+                        )
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    samples: Samples = {
+        (protocol, scenario): [] for protocol in PROTOCOLS for scenario in SCENARIOS
+    }
+    Sweep_Folder.mkdir(parents=True)
+
+    for protocol in PROTOCOLS:
+        for scenario in SCENARIOS:
+            key = (protocol, scenario)
+            next_seed = 0
+            while not is_converged(samples[key], rng) and next_seed < Max_Seeds:
+                seeds = list(range(next_seed, next_seed + Concurrency))
+                next_seed += Concurrency
+
+                print(f"Testing {protocol} with {scenario} scenario, seeds {seeds}")
+                samples[key] += run_wave(protocol, scenario, seeds)
+
+            print(f"{protocol} with {scenario}: {len(samples[key])} seeds")
+            write_summary(samples, rng)
@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.joinpath("src")))
+
+from udp import (  # noqa: E402
+    CRC,
+    U16,
+    SENDER_HEADER_SIZE,
+    SENDER_CRC_OFFSET,
+    SENDER_SIZE_OFFSET,
+    SENDER_RESOLUTION_OFFSET,
+    SENDER_FRAME_RATE_OFFSET,
+    RECEIVER_HEADER_SIZE,
+    RECEIVER_CRC_OFFSET,
+    RECEIVER_RESOLUTION_OFFSET,
+    RECEIVER_NO_OF_NACKS_OFFSET,
+    RECEIVER_FRAME_RATE_OFFSET,
+    NACK_SIZE,
+)
+from crc import crc32c_batch, sender_crc_input, receiver_crc_input  # noqa: E402
+
+# Serialized by src/common/udp.zig with Zig 0.14.1. The sender packet is a 720p
+# 60 fps key frame with 16 bytes of data, the receiver packet asks for 1080p
+# 30 fps and carries the nacks 7 and 9.
+SENDER_PACKET = bytes.fromhex(
+    "8877665544332211eb32a4f8ffffffff08070605040302019914bf781000d002"
+    "0302013c00000000000102030405060708090a0b0c0d0e0f"
+)
+RECEIVER_PACKET = bytes.fromhex(
+    "a71002a93804021e0100000007000000000000000900000000000000"
+)
+
+
+def test_offsets_match_zig_packets():
+    assert len(SENDER_PACKET) == SENDER_HEADER_SIZE + 16
+    assert U16.unpack_from(SENDER_PACKET, SENDER_SIZE_OFFSET)[0] == 16
+    assert U16.unpack_from(SENDER_PACKET, SENDER_RESOLUTION_OFFSET)[0] == 720
+    assert SENDER_PACKET[SENDER_FRAME_RATE_OFFSET] == 60
+    assert CRC.unpack_from(SENDER_PACKET, SENDER_CRC_OFFSET)[0] == 0x78BF1499
+    assert crc32c_batch([sender_crc_input(SENDER_PACKET)])[0] == 0x78BF1499
+
+    assert len(RECEIVER_PACKET) == RECEIVER_HEADER_SIZE + 2 * NACK_SIZE
+    assert U16.unpack_from(RECEIVER_PACKET, RECEIVER_RESOLUTION_OFFSET)[0] == 1080
+    assert RECEIVER_PACKET[RECEIVER_NO_OF_NACKS_OFFSET] == 2
+    assert RECEIVER_PACKET[RECEIVER_FRAME_RATE_OFFSET] == 30
+    assert CRC.unpack_from(RECEIVER_PACKET, RECEIVER_CRC_OFFSET)[0] == 0xA90210A7
+    assert crc32c_batch([receiver_crc_input(RECEIVER_PACKET)])[0] == 0xA90210A7